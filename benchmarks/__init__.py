@@ -0,0 +1,9 @@
+import time
+
+
+def timed(function, *args):
+    """function(*args) and the seconds it took
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
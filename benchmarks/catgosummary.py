@@ -0,0 +1,84 @@
+import sys
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import timed
+from src.calculate_catgo_summary import CatgoSummary
+
+STATS = ['count', 'pct']
+
+
+def make_ae(ncategories=500, ngroups=50, nsubjects=5_000, nrecords=100_000, seed=0):
+    """An adverse event shaped frame: nrecords events of nsubjects subjects, each subject in one of ngroups
+    treatment by site groups, each event one of ncategories terms
+    """
+    r = np.random.default_rng(seed)
+    ntreatments = 5
+    nsites = max(ngroups // ntreatments, 1)
+    subjects = np.arange(nsubjects)
+    treatment = r.integers(0, ntreatments, nsubjects)
+    site = r.integers(0, nsites, nsubjects)
+    subject = r.integers(0, nsubjects, nrecords)
+    # A few common terms and a long tail, as in a real AE listing
+    term = np.minimum(r.zipf(1.3, nrecords) - 1, ncategories - 1)
+
+    return pd.DataFrame({'USUBJID': [f'S{s:05}' for s in subjects[subject]],
+                         'TRTLST': [f'{0.05 * t + 0.15:.2f} mg/kg' for t in treatment[subject]],
+                         'SITE': [f'{s:03}' for s in site[subject]],
+                         'AEDECOD': [f'TERM {t:03}' for t in term]})
+
+
+def loc_convert(df, anavar):
+    # _convert_to_dict before the array conversion: a .loc lookup and to_dict per row and category, and one
+    # Decimal(str(value)) per cell
+    result = []
+    for multindx in df.index:
+        vardict = {'type': 'categorical', 'anavar': anavar, 'indexvar': df.index.names, 'index': []}
+        if isinstance(multindx, str):
+            vardict['index'] = [*vardict['index'], multindx]
+        else:
+            vardict['index'] = [*vardict['index'], *multindx]
+        for var in df.columns.unique(level=anavar):
+            vardict['rows'] = vardict.get('rows', {})
+            vardict['rows'][var] = df.loc[multindx, var].to_dict()
+            for key, value in vardict['rows'][var].items():
+                vardict['rows'][var][key] = Decimal(str(value)) if not np.isnan(value) else None
+        result.append(vardict)
+
+    return result
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.catgosummary',
+                                     description='CatgoSummary._convert_to_dict with number decimal, float and '
+                                                 'string against the per row .loc conversion it replaced')
+    parser.add_argument('--categories', type=int, default=500, help='anavar categories (default: %(default)s)')
+    parser.add_argument('--groups', type=int, default=50, help='by-groups (default: %(default)s)')
+    parser.add_argument('--records', type=int, default=100_000, help='records (default: %(default)s)')
+    parser.add_argument('--no-loc', action='store_true', help='skip the .loc conversion')
+    args = parser.parse_args(argv)
+
+    catgo = CatgoSummary(make_ae(args.categories, args.groups, nrecords=args.records), 'AEDECOD', ['TRTLST', 'SITE'],
+                         'USUBJID', STATS)
+    statsdf, elapsed = timed(lambda: catgo._getstats('AEDECOD', True, catgo.totalover, *catgo.stats))
+    print(f'{len(statsdf)} by-groups x {len(statsdf.columns.unique(level=0))} categories, stats {elapsed:.3f}s')
+
+    converted = {}
+    for number, decimals in (('decimal', None), ('float', None), ('string', 1)):
+        converted[number], elapsed = timed(lambda: catgo._convert_to_dict(statsdf, 'AEDECOD', number, decimals))
+        print(f'{number:<8} {elapsed:8.3f}s')
+
+    if not args.no_loc:
+        result, elapsed = timed(lambda: loc_convert(statsdf, 'AEDECOD'))
+        assert result == converted['decimal']
+        print(f'{".loc":<8} {elapsed:8.3f}s')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import sys
+
+from benchmarks import timed
+from src.Column import Cell, Cells, Columns
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def make_cells(n, ncols=10):
+    return [Cell(i, colindex=i % ncols, rowindex=i // ncols) for i in range(n)]
+
+
+def tuple_tabulate(cells):
+    # Cells._tabulate and the Columns.columns setter before the Grid store, growing tuples one cell at a time
+    table = {}
+    columns = {}
+    for cell in cells:
+        if cell.colindex in table:
+            table[cell.colindex][cell.rowindex] = table[cell.colindex].get(cell.rowindex, tuple()) + (cell,)
+            columns[cell.colindex] = columns[cell.colindex] + (cell,)
+        else:
+            table[cell.colindex] = {cell.rowindex: (cell,)}
+            columns[cell.colindex] = (cell,)
+
+    return table, columns
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.grid',
+                                     description='Build time of the Cells grid store and the Columns index, against '
+                                                 'the tuple store they replaced')
+    parser.add_argument('sizes', nargs='*', type=int, default=SIZES, help='cell counts (default: 10k 100k 1M)')
+    parser.add_argument('--tuples-max', type=int, default=100_000,
+                        help='largest size the quadratic tuple store is timed at (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    print(f'{"cells":>10} {"grid":>8} {"columns":>8} {"rows":>8} {"tuples":>8}')
+    for n in args.sizes:
+        cells = make_cells(n)
+        grid, build = timed(Cells, *cells)
+        index = timed(Columns.columns.fset, grid, grid.cells)[1]
+        colindices = tuple(grid.table.columns)
+        width, spacing = {colindex: 10 for colindex in colindices}, {colindex: 0 for colindex in colindices}
+        rows = timed(lambda: [grid._getrow(rowindex, *colindices, width=width, spacing=spacing) for rowindex in
+                              grid._sortedrowindices()])[1]
+        tuples = f'{timed(tuple_tabulate, cells)[1]:8.3f}' if n <= args.tuples_max else f'{"-":>8}'
+        print(f'{n:>10} {build:8.3f} {index:8.3f} {rows:8.3f} {tuples}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
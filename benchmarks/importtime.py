@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+# The rendering engine, which must not pull in the summary calculators' dependencies
+RENDER_MODULES = ('src.Column', 'src.Table', 'src.LoadStats', 'src.LoadLabels', 'src.LoadSummary')
+HEAVY_MODULES = ('pandas', 'numpy', 'simplejson')
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(elapsed, *(module for module in {heavy!r} if module in sys.modules))
+"""
+
+
+def importtime(modules=RENDER_MODULES, heavy=HEAVY_MODULES):
+    """Seconds to import modules in a fresh interpreter, and which of heavy got imported along the way
+    """
+    script = _SCRIPT.format(imports='\n'.join(f'import {module}' for module in modules), heavy=tuple(heavy))
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.importtime',
+                                     description='Checks the rendering engine imports without pandas, numpy and '
+                                                 'simplejson, within a time budget')
+    parser.add_argument('--budget', type=float, default=150, help='milliseconds (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='best of this many fresh interpreters')
+    args = parser.parse_args(argv)
+
+    results = [importtime() for _ in range(args.repeat)]
+    elapsed = min(result[0] for result in results) * 1000
+    loaded = sorted({module for result in results for module in result[1]})
+
+    print(f'{", ".join(RENDER_MODULES)}: {elapsed:.1f} ms (budget {args.budget:g} ms)')
+    if loaded:
+        print(f'imported {", ".join(loaded)}')
+    if loaded or elapsed > args.budget:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
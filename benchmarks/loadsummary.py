@@ -0,0 +1,91 @@
+import contextlib
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks import timed
+from src.LoadSummary import LoadSummary
+
+SIZES = (1_000, 4_000, 20_000)
+
+CONFIGS = {'stat-label-config.txt': '[DEFAULT]\ncount = n\nmean = Mean\nstd = SD\nmedian = Median\nmin = Min\n'
+                                    'max = Max\n',
+           'stat-format-config.txt': '[DEFAULT]\ncount = {:.0f}\nmean = {:.1f}\nstd = {:.2f}\nmedian = {:.1f}\n'
+                                     'min = {:.0f}\nmax = {:.0f}\n',
+           'stat-template-config.txt': '[DEFAULT]\ncount = {}\nmean, std = {} ({})\nmedian = {}\nmin, max = {}, {}\n',
+           'label-config.txt': '[DEFAULT]\nTRTLST~Treatment\nGROUP~Group\n'}
+
+
+def make_summary(nrecords, nanavars=5, ntreatments=3):
+    """A NumericSummary-shaped summary, each anavar summarised by treatment and by a group with a new value every
+    nanavars * ntreatments records
+    """
+    r = random.Random(0)
+    records = []
+    for i in range(nrecords):
+        records.append({'type': 'numeric', 'anavar': f'VAR{i % nanavars}', 'indexvar': ['TRTLST', 'GROUP'],
+                        'index': [f'{(i // nanavars) % ntreatments * 0.05 + 0.15:.2f} mg/kg',
+                                  f'G{i // (nanavars * ntreatments):05}'],
+                        'statistics': {stat: r.uniform(0, 100) for stat in ('count', 'mean', 'std', 'median', 'min',
+                                                                             'max')}})
+
+    return {'summary': records}
+
+
+def tuple_dedup(cells):
+    # The loaders before the hashed key set: each stats cell is looked up in the tuple built so far, which is copied
+    # on every append
+    loaded = tuple()
+    for cell in cells:
+        if cell.colindex != 'stats' or cell not in loaded:
+            loaded = loaded + (cell,)
+
+    return loaded
+
+
+def load(summary, configdir):
+    config = lambda name: os.path.join(configdir, name)
+    loadsummary = LoadSummary.from_summary(summary, statlabelconfig=config('stat-label-config.txt'),
+                                           statformatconfig=config('stat-format-config.txt'),
+                                           stattemplateconfig=config('stat-template-config.txt'), statsectionindex=0,
+                                           colindex=0, sortindex=(1,), noprintindex=(), rowgrplevels=(1,),
+                                           labelconfig=config('label-config.txt'), labelsectionindex=0)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return loadsummary._loadnumeric()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadsummary',
+                                     description='LoadSummary._loadnumeric on numeric summaries. "tuples" adds the '
+                                                 'tuple scan the loaders used to find duplicate stat label cells, '
+                                                 'replayed over the loaded cells')
+    parser.add_argument('sizes', nargs='*', type=int, default=SIZES, help='records (default: 1k 4k 20k)')
+    parser.add_argument('--tuples-max', type=int, default=4_000,
+                        help='most records the quadratic tuple scan is timed at (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as configdir:
+        for name, content in CONFIGS.items():
+            with open(os.path.join(configdir, name), 'w') as fl:
+                fl.write(content)
+
+        print(f'{"records":>8} {"cells":>8} {"load":>8} {"tuples":>8}')
+        for n in args.sizes:
+            summary = make_summary(n)
+            cells, elapsed = timed(load, summary, configdir)
+
+            tuples = '-'
+            if n <= args.tuples_max:
+                loaded, seconds = timed(tuple_dedup, cells)
+                assert len(loaded) == len(cells)
+                tuples = f'{elapsed + seconds:.3f}'
+            print(f'{n:>8} {len(cells):>8} {elapsed:8.3f} {tuples:>8}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import sys
+from statistics import mode
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import timed
+from src.calculate_summary import NumericSummary, q_at
+
+SIZES = (100_000, 1_000_000)
+
+ANAVARS = ['AGE', 'WGTBL', 'HGTBL']
+BYVARS = (['TRTLST', 'RACE'], ['TRTLST', 'SITE'])
+STATS = ['count', 'mean', 'std', 'median', 'min', 'max', mode, q_at(0.05), q_at(0.95)]
+
+
+def make_adsl(nrows, nsites=50, seed=0):
+    """An ADSL-shaped frame: treatment, race and site by-variables, integer age and one decimal place weight and
+    height with a few missing values
+    """
+    r = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'TRTLST': r.choice(['0.15 mg/kg', '0.20 mg/kg', '0.25 mg/kg'], nrows),
+        'RACE': r.choice(['WHITE', 'BLACK OR AFRICAN AMERICAN', 'ASIAN', 'AMERICAN INDIAN OR ALASKA NATIVE', 'OTHER'],
+                         nrows, p=[0.6, 0.2, 0.1, 0.05, 0.05]),
+        'SITE': r.choice([f'{site:03}' for site in range(1, nsites + 1)], nrows),
+        'AGE': r.integers(18, 86, nrows).astype(float),
+        'WGTBL': np.round(r.normal(75, 15, nrows), 1),
+        'HGTBL': np.round(r.normal(170, 10, nrows), 1)})
+    for var in ('WGTBL', 'HGTBL'):
+        df.loc[r.random(nrows) < 0.01, var] = np.nan
+
+    return df
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.numericsummary',
+                                     description='NumericSummary._calculate_stats fast path against groupby.agg with '
+                                                 'the stats as given, on ADSL-shaped frames')
+    parser.add_argument('sizes', nargs='*', type=int, default=SIZES, help='rows (default: 100k 1M)')
+    parser.add_argument('--no-agg', action='store_true', help='time the fast path only')
+    args = parser.parse_args(argv)
+
+    print(f'{"rows":>8} {"byvars":<12} {"groups":>6} {"fast":>8} {"agg":>8}')
+    for n in args.sizes:
+        df = make_adsl(n)
+        for byvars in BYVARS:
+            numsum = NumericSummary(df, ANAVARS, byvars, STATS)
+            fast, elapsed = timed(lambda: numsum._calculate_stats(fast=True))
+
+            agg = '-'
+            if not args.no_agg:
+                slow, seconds = timed(lambda: numsum._calculate_stats(fast=False))
+                pd.testing.assert_frame_equal(fast, slow, check_dtype=False)
+                agg = f'{seconds:.3f}'
+            print(f'{n:>8} {"*".join(byvars):<12} {len(fast):>6} {elapsed:8.3f} {agg:>8}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import contextlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.LoadSummary import *
+
+# Spec keys that are config files, resolved against the manifest's directory with the other paths
+CONFIGS = ('statlabelconfig', 'statformatconfig', 'stattemplateconfig', 'labelconfig', 'labelorderconfig')
+PATHS = ('summary', 'output') + CONFIGS
+
+DEFAULTS = {'type': 'numeric', 'statsectionindex': 0, 'colindex': 0, 'sortindex': (1,), 'noprintindex': (),
+            'rowgrplevels': (1,), 'labelorderconfig': None, 'labelsectionindex': 0, 'printanavar': True,
+            'linesize': 89, 'pagesize': 45, 'idcols': ('stats',), 'label': None, 'just': '<', 'spacing': 0,
+            'minwidth': 1, 'wrap': False, 'wrap_header': False, 'title': None, 'footnotes': None, 'timestamp': False,
+            'double_spaced': False, 'allocator': 'recurse'}
+
+
+def read_manifest(manifest):
+    """Table specs of a JSON manifest
+
+    The manifest is {"defaults": {...}, "tables": [{...}, ...]}. Each table spec is the defaults updated with its own
+    keys, and names a summary (.json or .npz), the stat and label configs, an output file and the Page, Columns and
+    Table options, e.g.
+
+        {"defaults": {"statlabelconfig": "stat-label-config.txt", ..., "linesize": 89, "pagesize": 45},
+         "tables": [{"summary": "json/t1.json", "output": "t1.txt", "colorder": ["stats", "A", "B"],
+                     "title": "Table 1~Age", "footnotes": ["A footnote", ["Right", ">"]], "timestamp": true}]}
+
+    Relative paths are relative to the manifest. "timestamp" adds the right justified run date footnote.
+    """
+    import simplejson as json
+
+    with open(manifest, 'r') as fl:
+        content = json.load(fl)
+
+    root = os.path.dirname(os.path.abspath(manifest))
+    specs = []
+    for i, table in enumerate(content.get('tables', [])):
+        spec = {**DEFAULTS, **content.get('defaults', {}), **table}
+        for key in PATHS:
+            if spec.get(key) is not None:
+                spec[key] = os.path.join(root, spec[key])
+        spec.setdefault('name', os.path.basename(spec['output']) if spec.get('output') else str(i))
+        specs.append(spec)
+
+    return specs
+
+
+def _tuple(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def build_table(spec):
+    loadsummary = LoadSummary(jsonfile=spec['summary'], statlabelconfig=spec['statlabelconfig'],
+                              statformatconfig=spec['statformatconfig'], stattemplateconfig=spec['stattemplateconfig'],
+                              statsectionindex=spec['statsectionindex'], colindex=spec['colindex'],
+                              sortindex=tuple(spec['sortindex']), noprintindex=tuple(spec['noprintindex']),
+                              rowgrplevels=tuple(spec['rowgrplevels']), labelconfig=spec['labelconfig'],
+                              labelorderconfig=spec['labelorderconfig'], labelsectionindex=spec['labelsectionindex'],
+                              printanavar=spec['printanavar'])
+    cells = loadsummary._loadnumeric() if spec['type'] == 'numeric' else loadsummary._loadcategoric()
+
+    footnotes = spec['footnotes']
+    if isinstance(footnotes, list):
+        footnotes = [_tuple(footnote) for footnote in footnotes]
+    if spec['timestamp']:
+        footnotes = [*(footnotes if isinstance(footnotes, list) else [footnotes] if footnotes else []),
+                     (datetime.now().strftime("%d%b%Y:%H:%M:%S").upper(), '>')]
+
+    return Table(Columns(
+        *cells,
+        colorder=tuple(spec['colorder']), idcols=tuple(spec['idcols']), label=_tuple(spec['label']),
+        just=_tuple(spec['just']), spacing=_tuple(spec['spacing']), minwidth=spec['minwidth'], wrap=spec['wrap'],
+        wrap_header=spec['wrap_header']), page=Page(spec['linesize'], spec['pagesize']), title=spec['title'],
+        footnotes=footnotes, double_spaced=spec['double_spaced'], allocator=spec['allocator'])
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_atomic(file, write):
+    """Calls write(fl) on a temporary file next to file and renames it over file, so file is either the old or the
+    complete new output
+    """
+    directory = os.path.dirname(os.path.abspath(file))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file), suffix='.tmp')
+    try:
+        with open(fd, 'w') as fl:
+            write(fl)
+        # mkstemp creates the file readable by its owner only, the output gets the mode open() would give it
+        os.chmod(temp, 0o666 & ~_umask())
+        os.replace(temp, file)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def render_table(spec):
+    """Renders one table spec to its output, returns (name, output, seconds)
+    """
+    start = time.perf_counter()
+    # LoadSummary prints its row labels while loading and print_table its column pages, neither goes in the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        write_atomic(spec['output'], build_table(spec).print_table)
+
+    return spec['name'], spec['output'], time.perf_counter() - start
+
+
+def _warm(specs):
+    # Parse each distinct config once per worker, tasks then share them through the config registry. A config that
+    # fails to parse is left to fail its own tables when they run
+    seen = set()
+    for spec in specs:
+        key = tuple(spec.get(config) for config in CONFIGS)
+        if key not in seen:
+            seen.add(key)
+            try:
+                LoadStats(labelconfig=spec['statlabelconfig'], formatconfig=spec['statformatconfig'],
+                          templateconfig=spec['stattemplateconfig']).gettemplates()
+                for config in (spec['labelconfig'], spec['labelorderconfig']):
+                    if config is not None:
+                        LoadLabels()._readconfig(config)
+            except Exception:
+                pass
+
+
+def run_batch(specs, workers=None):
+    """Renders table specs in a pool of worker processes, yields (name, output, seconds) as each table finishes
+
+    workers=1 renders in this process. A failed table yields its exception in place of seconds, the other tables
+    still run.
+    """
+    specs = list(specs)
+    if workers == 1:
+        _warm(specs)
+        for spec in specs:
+            try:
+                yield render_table(spec)
+            except Exception as e:
+                yield spec['name'], spec['output'], e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm, initargs=(specs,)) as executor:
+        futures = {executor.submit(render_table, spec): spec for spec in specs}
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                yield spec['name'], spec['output'], e
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m src.BatchReport',
+                                     description='Renders the tables of a manifest in parallel')
+    parser.add_argument('manifest', help='JSON manifest of table specs, see read_manifest')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    failed = 0
+    specs = read_manifest(args.manifest)
+    for name, output, seconds in run_batch(specs, workers=args.workers):
+        if isinstance(seconds, Exception):
+            failed += 1
+            print(f'{name}: FAILED {seconds!r}')
+        else:
+            print(f'{name}: {seconds:.3f}s -> {output}')
+    print(f'{len(specs) - failed} of {len(specs)} tables in {time.perf_counter() - start:.3f}s')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    import sys
+
+    sys.exit(main())
@@ -1,16 +1,77 @@
 from textwrap import TextWrapper
 from itertools import zip_longest
+from collections import OrderedDict, namedtuple
+import copy
 import math
 from operator import attrgetter
-from statistics import mean, median
 from sys import stdout
 from datetime import datetime
+from threading import Lock
+
+
+class WrapCache:
+    """LRU cache of wrapped text shared by all cells
+
+    Keyed by (text, print_width, initial_indent, split), so cells with identical content and width are wrapped once.
+    """
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._wrapped = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._wrapped)
+
+    def _wrap(self, text, print_width, initial_indent, split):
+        wrapper = TextWrapper(width=print_width, initial_indent=initial_indent)
+
+        if text.isspace():
+            wrapped_text = [' ']
+        elif split is None:
+            wrapped_text = wrapper.wrap(text)
+        else:
+            wrapped_text = []
+            for part in text.split(split):
+                wrapped_text.extend(wrapper.wrap(part))
+
+        return tuple(wrapped_text)
+
+    def wrap(self, text, print_width, initial_indent='', split=None):
+        key = (text, print_width, initial_indent, split)
+        with self._lock:
+            wrapped_text = self._wrapped.get(key)
+            if wrapped_text is not None:
+                self.hits += 1
+                self._wrapped.move_to_end(key)
+                return wrapped_text
+
+        # Wrapped outside the lock, so column pages rendered in threads only wait on the dict updates
+        wrapped_text = self._wrap(*key)
+        with self._lock:
+            self.misses += 1
+            self._wrapped[key] = wrapped_text
+            if len(self._wrapped) > self.maxsize:
+                self._wrapped.popitem(last=False)
+
+        return wrapped_text
+
+    def clear(self):
+        with self._lock:
+            self._wrapped.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+wrap_cache = WrapCache()
 
 
 class Cell():
     def __init__(self, value, colindex=None, rowindex=None, spacing=None, just=None, split=None,
                  print_width=None, noprint=False, label=None, initial_indent=''):
         self.value = value
+        self._wrapped_text = None
 
         if self.value is None:
             self.text = ''
@@ -63,23 +124,34 @@ class Cell():
 
     @print_width.setter
     def print_width(self, new_print_width):
+        if new_print_width != self._print_width:
+            self._wrapped_text = None
         self._print_width = new_print_width
 
     @property
-    def wrapped_text(self):
-        wrapper = TextWrapper(width=self.print_width, initial_indent=self.initial_indent)
+    def initial_indent(self):
+        return self._initial_indent
 
-        if self.text.isspace():
-            wrapped_text = [' ']
-        elif self.split is None:
-            wrapped_text = wrapper.wrap(self.text)
-        else:
-            parts = self.text.split(self.split)
-            wrapped_text = []
-            for part in parts:
-                wrapped_text = wrapped_text + wrapper.wrap(part)
+    @initial_indent.setter
+    def initial_indent(self, new_initial_indent):
+        self._initial_indent = new_initial_indent
+        self._wrapped_text = None
 
-        return wrapped_text
+    @property
+    def split(self):
+        return self._split
+
+    @split.setter
+    def split(self, new_split):
+        self._split = new_split
+        self._wrapped_text = None
+
+    @property
+    def wrapped_text(self):
+        if self._wrapped_text is None:
+            self._wrapped_text = wrap_cache.wrap(self.text, self.print_width, self.initial_indent, self.split)
+
+        return self._wrapped_text
 
     @property
     def max_lines(self):
@@ -101,24 +173,156 @@ class Cell():
             file.write('\n')
 
 
+class CellLayout(namedtuple('CellLayout', ('cell', 'print_width', 'wrapped_text'))):
+    """Immutable record of a cell laid out at a print width, leaving the cell itself unchanged
+
+    Column pages lay out the same cells at different widths, so each page gets its own records and pages can be
+    rendered independently.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, cell, print_width):
+        return cls(cell, print_width, wrap_cache.wrap(cell.text, print_width, cell.initial_indent, cell.split))
+
+    def __repr__(self):
+        return self.cell.text
+
+    @property
+    def label(self):
+        return self.cell.label
+
+    @property
+    def max_lines(self):
+        return len(self.wrapped_text)
+
+    def write_line(self, lineno, file):
+        spacing = self.cell.spacing if self.cell.spacing is not None else 0
+
+        if 0 <= lineno < len(self.wrapped_text):
+            file.write(f"{' ' * spacing}{self.wrapped_text[lineno]:{self.cell.just}{self.print_width}}")
+        else:
+            file.write(f"{' ' * spacing}{' ' * self.print_width}")
+
+
+class LayoutCache:
+    """LRU cache of laid out rows and row labels
+
+    Bounded, so a table holds the layouts of the rows being printed and not of all its cells. Pickled empty, for column
+    pages sent to worker processes.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getstate__(self):
+        return {'maxsize': self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'])
+
+    def get(self, key, layout):
+        """Cached value of key, layout() when there is none
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                return value
+
+        value = layout()
+        with self._lock:
+            self._items[key] = value
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
 # test = Column(["This is no a test", "This is a test"])
 # print(test.pref_width)
 
+class Grid:
+    """Column-indexed cell store
+
+    Row indices are sorted once and mapped to ordinals, each column holds one slot per ordinal with the cells at that
+    position, so a row is assembled by direct index.
+    """
+    def __init__(self, cells):
+        self.rowindices = sorted(set(cell.rowindex for cell in cells))
+        self.rowpos = {rowindex: i for i, rowindex in enumerate(self.rowindices)}
+        self.columns = {}
+        self._place(cells)
+
+    def _place(self, cells):
+        nrows = len(self.rowindices)
+        for cell in cells:
+            column = self.columns.get(cell.colindex)
+            if column is None:
+                column = self.columns[cell.colindex] = [None] * nrows
+
+            pos = self.rowpos[cell.rowindex]
+            if column[pos] is None:
+                column[pos] = [cell]
+            else:
+                column[pos].append(cell)
+
+    def add(self, cells):
+        """Adds cells to the store
+
+        Row indices after the last one only extend every column, a row index falling between existing ones moves the
+        slots after it along.
+        """
+        new = sorted(set(cell.rowindex for cell in cells if cell.rowindex not in self.rowpos))
+        if new and self.rowindices and new[0] < self.rowindices[-1]:
+            slots = {colindex: dict(zip(self.rowindices, column)) for colindex, column in self.columns.items()}
+            self.rowindices = sorted(self.rowindices + new)
+            self.rowpos = {rowindex: i for i, rowindex in enumerate(self.rowindices)}
+            self.columns = {colindex: [column.get(rowindex) for rowindex in self.rowindices] for colindex, column in
+                            slots.items()}
+        elif new:
+            self.rowpos.update((rowindex, i) for i, rowindex in enumerate(new, len(self.rowindices)))
+            self.rowindices.extend(new)
+            for column in self.columns.values():
+                column.extend([None] * len(new))
+
+        self._place(cells)
+
+    def __len__(self):
+        return len(self.rowindices)
+
+    def getcells(self, colindex, rowindex):
+        return self.columns[colindex][self.rowpos[rowindex]]
+
+    def subset(self, colindices):
+        grid = copy.copy(self)
+        grid.columns = {colindex: self.columns[colindex] for colindex in colindices if colindex in self.columns}
+        return grid
+
+
 class Cells:
+    # Row positions laid out together
+    layout_rows = 64
+
     def __init__(self, *cells):
         self.cells = cells
         self.table = self._tabulate()
 
     def _tabulate(self):
-        table = {}
-        for cell in self.cells:
-            if cell.colindex in table:
-                table[cell.colindex][cell.rowindex] = table[cell.colindex].get(cell.rowindex, tuple()) + (cell,)
-            else:
-                table[cell.colindex] = {}
-                table[cell.colindex][cell.rowindex] = (cell,)
-
-        return table
+        # Blocks of rows, a few for each column page being planned or printed
+        self._layouts = LayoutCache(16)
+        self._labelpaths = LayoutCache()
+        self._labellayouts = LayoutCache()
+        self._rowlabels = LayoutCache()
+        return Grid(self.cells)
 
     def set_cell_width(self, width):
         for cell in self.cells:
@@ -128,20 +332,50 @@ class Cells:
         return self
 
     def _sortedrowindices(self):
-        return sorted(tuple(set(cell.rowindex for cell in self.cells)))
+        return self.table.rowindices
 
     def _getrow(self, rowindex, *colindices, width, spacing):
-        row = ()
+        pos = self.table.rowpos[rowindex]
+        row = []
         for colindex in colindices:
-            row = row + self.table[colindex].get(rowindex, (Cell(None, print_width=width[colindex], spacing=spacing[colindex]),))
+            cells = self.table.columns[colindex][pos]
+            if cells is None:
+                row.append(Cell(None, print_width=width[colindex], spacing=spacing[colindex]))
+            else:
+                row.extend(CellLayout.of(cell, width[colindex]) for cell in cells)
 
         return Row(*row)
 
+    def _layoutrows(self, colindices, width, spacing, start):
+        rows = []
+        for rowindex in self._sortedrowindices()[start:start + self.layout_rows]:
+            row = self._getrow(rowindex, *colindices, width=width, spacing=spacing)
+            rows.append((row, self._getrowlabels(row)))
+
+        return tuple(rows)
+
+    def getrows(self, *colindices, width, spacing, start):
+        """Rows of the columns at row positions start to start + layout_rows - 1, each with its label path
+
+        The cells are laid out as CellLayouts, so the cells themselves are unchanged. Blocks of rows are cached, so
+        rows planned and printed close together are laid out once, but only the most recently used blocks are kept:
+        memory follows the pages being printed, not the size of the table.
+        """
+        key = (colindices, tuple(width[colindex] for colindex in colindices),
+               tuple(spacing[colindex] for colindex in colindices), start)
+        return self._layouts.get(key, lambda: self._layoutrows(colindices, width, spacing, start))
+
     def _getrowlabels(self, row):
+        # Rows mostly repeat a few combinations of cell labels, each is merged into a label path once. Labels given as
+        # lists are keyed as tuples
+        celllabels = tuple(tuple(cell.label) if cell.label is not None else None for cell in row.cells)
+        return self._labelpaths.get(celllabels, lambda: self._mergelabels(celllabels))
+
+    def _mergelabels(self, celllabels):
         labels = tuple()
-        for cell in row.cells:
-            if cell.label is not None:
-                for i, label in enumerate(cell.label):
+        for celllabel in celllabels:
+            if celllabel is not None:
+                for i, label in enumerate(celllabel):
                     if i < len(labels) and label != labels[i]:
                         labels = labels + (label,)
                     elif i >= len(labels):
@@ -149,6 +383,19 @@ class Cells:
 
         return labels
 
+    def _getlabellayout(self, label, level, print_width):
+        return self._labellayouts.get((label, level, print_width), lambda: CellLayout.of(
+            Cell(label, print_width=print_width, initial_indent=level * '  '), print_width))
+
+    def getrowlabel(self, labels, print_index, print_width):
+        """RowLabel of a label path, shared by all row groups and column pages printing it the same way
+
+        Each label is wrapped once per level and width, whichever paths it appears in.
+        """
+        return self._rowlabels.get((labels, print_index, print_width), lambda: RowLabel(
+            *labels, print_index=print_index, print_width=print_width,
+            layouts=tuple(self._getlabellayout(label, level, print_width) for level, label in enumerate(labels))))
+
     def _make_rowlabel(self, previous_row_label, current_row_label):
         j = 0
         for i in range(len(current_row_label)):
@@ -159,25 +406,56 @@ class Cells:
 
         return j
 
-    def getrowgroup(self, *colindices, width, spacing):
-        for i, rowindex in enumerate(self._sortedrowindices()):
-            current_row = self._getrow(rowindex, *colindices, width=width, spacing=spacing)
-            current_row_label = self._getrowlabels(current_row)
-
-            if i == 0:
+    def getrowgroup(self, *colindices, width, spacing, start=0):
+        """Yields the row groups from the row at position start on, the first one with its whole row label
+        """
+        # Row labels span the printed width of the columns
+        label_width = sum(width[colindex] + spacing[colindex] for colindex in colindices)
+        rowindices = self._sortedrowindices()
+        rows, rowsstart = (), start
+        for i in range(start, len(rowindices)):
+            if i - rowsstart >= len(rows):
+                rowsstart = i - i % self.layout_rows
+                rows = self.getrows(*colindices, width=width, spacing=spacing, start=rowsstart)
+            current_row, current_row_label = rows[i - rowsstart]
+
+            if i == start:
                 differ_at = 0
-                rows = (current_row,)
+                group = (current_row,)
                 previous_row_label = current_row_label
             else:
                 if previous_row_label == current_row_label:
-                    rows = rows + (current_row,)
+                    group = group + (current_row,)
                 else:
-                    yield RowGroup(*rows, rowlabel=RowLabel(*previous_row_label, print_index=differ_at))
+                    yield RowGroup(*group, rowlabel=self.getrowlabel(previous_row_label, differ_at, label_width))
                     differ_at = self._make_rowlabel(previous_row_label, current_row_label)
-                    rows = (current_row,)
+                    group = (current_row,)
                     previous_row_label = current_row_label
 
-        yield RowGroup(*rows, rowlabel=RowLabel(*previous_row_label, print_index=differ_at))
+        yield RowGroup(*group, rowlabel=self.getrowlabel(previous_row_label, differ_at, label_width))
+
+
+class ColumnStats:
+    """Content width statistics of one column, updated as cells are added
+    """
+    def __init__(self, *cells):
+        self.count = 0
+        self.total_width = 0
+        self.max_width = None
+
+        for cell in cells:
+            self.add(cell)
+
+    def add(self, cell):
+        content_width = cell.content_width
+        self.count += 1
+        self.total_width += content_width
+        if self.max_width is None or content_width > self.max_width:
+            self.max_width = content_width
+
+    @property
+    def avg_width(self):
+        return self.total_width / self.count
 
 
 class Columns(Cells):
@@ -205,10 +483,53 @@ class Columns(Cells):
             cell.just = self.just.get(cell.colindex, '<')
             cell.split = self.split
 
+        self.stats = {column: ColumnStats(*cells) for column, cells in self.columns.items()}
+
         self.width = {0: {}}
         for column in self.colorder:
             self.width[0][column] = self.get_pref_width(column)
 
+        # Bumped whenever pages and widths are laid out again, so layouts built on them can tell they are stale
+        self.generation = 0
+
+    def add_cells(self, *cells):
+        for cell in cells:
+            cell.spacing = self.spacing.get(cell.colindex, 0)
+            cell.just = self.just.get(cell.colindex, '<')
+            cell.split = self.split
+
+            if cell.colindex in self._columns:
+                self._columns[cell.colindex].append(cell)
+                self.stats[cell.colindex].add(cell)
+            else:
+                self._columns[cell.colindex] = [cell]
+                self.stats[cell.colindex] = ColumnStats(cell)
+
+        self.cells = self._rows = self.rows = self.cells + cells
+        self.table.add(cells)
+        # Laid out rows are stale, label layouts only depend on the labels and widths
+        self._layouts.clear()
+
+        self.pages = {0: self.colorder}
+        self.width = {0: {column: self.get_pref_width(column) for column in self.colorder}}
+        self.generation += 1
+
+        return self
+
+    def column_page(self, pageindex):
+        """Shallow copy holding only the cells of one column page, small enough to hand to a worker process
+        """
+        page = copy.copy(self)
+        page._columns = {column: self._columns[column] for column in self.pages[pageindex] if column in self._columns}
+        page.cells = page._rows = page.rows = tuple(cell for cells in page._columns.values() for cell in cells)
+        page.stats = {column: self.stats[column] for column in page._columns}
+        page.table = self.table.subset(self.pages[pageindex])
+        page._layouts = LayoutCache(self._layouts.maxsize)
+        page._labelpaths = self._labelpaths
+        page._labellayouts = self._labellayouts
+        page._rowlabels = self._rowlabels
+        return page
+
     def set_width(self, pageindex, column, value):
         self.width[pageindex][column] = value
 
@@ -220,10 +541,11 @@ class Columns(Cells):
     def columns(self, cells):
         self._columns = {}
         for cell in cells:
-            if cell.colindex in self._columns:
-                self._columns[cell.colindex] = self._columns[cell.colindex] + (cell,)
+            column = self._columns.get(cell.colindex)
+            if column is None:
+                self._columns[cell.colindex] = [cell]
             else:
-                self._columns[cell.colindex] = (cell,)
+                column.append(cell)
 
     def set_property(self, value, default):
         if isinstance(value, dict):
@@ -337,21 +659,23 @@ class Columns(Cells):
                     self._header_just[column] = self.just[column]
 
     def get_max_content_width(self, column):
-        return max(cell.content_width for cell in self.columns[column])
+        return self.stats[column].max_width
 
     def get_avg_content_width(self, column):
-        return mean(cell.content_width for cell in self.columns[column])
+        return self.stats[column].avg_width
+
+    def get_max_label_width(self, column):
+        return max(len(string) for string in self.label[column].split(self.split))
 
     def get_pref_min_width(self, column):
         if not self.wrap[column]:
             if not self.wrap_header[column]:
-                return max(self.minwidth[column], self.get_max_content_width(column),
-                           *(len(string) for string in self.label[column].split(self.split)))
+                return max(self.minwidth[column], self.get_max_content_width(column), self.get_max_label_width(column))
             else:
                 return max(self.minwidth[column], self.get_max_content_width(column))
         else:
             if not self.wrap_header[column]:
-                return max(self.minwidth[column], *(len(string) for string in self.label[column].split(self.split)))
+                return max(self.minwidth[column], self.get_max_label_width(column))
             else:
                 return self.minwidth[column]
 
@@ -359,80 +683,58 @@ class Columns(Cells):
         return min(self.maxwidth[column], max(self.get_max_content_width(column), self.get_pref_min_width(column)))
 
     def recurse(self, cols, linesize, depth):
+        # Widths derived from content do not change while widths are allocated, so look them up once per call
+        allcolumns = set(column for columns in cols for column in columns)
+        avg_width = {column: self.get_avg_content_width(column) for column in allcolumns}
+        pref_min_width = {column: self.get_pref_min_width(column) for column in allcolumns}
+        pref_width = {column: self.get_pref_width(column) for column in allcolumns}
+
         for i, columns in enumerate(cols):
             pageindex = i + depth if depth > 0 else i
-            tot_used_width = sum([self.width[pageindex][column] + self.spacing[column] for column in columns])
+            width = self.width[pageindex]
+            tot_used_width = sum([width[column] + self.spacing[column] for column in columns])
             if tot_used_width < linesize:
                 remain_width = linesize - tot_used_width
-                while remain_width > 0 and any(
-                        self.width[pageindex][column] < self.maxwidth[column] for column in columns):
-                    tot_max_content_width = sum(
-                        self.get_max_content_width(column) for column in columns if
-                        self.width[pageindex][column] < self.maxwidth[column])
+                while remain_width > 0 and any(width[column] < self.maxwidth[column] for column in columns):
                     tot_avg_content_width = sum(
-                        self.get_avg_content_width(column) for column in columns if
-                        self.width[pageindex][column] < self.maxwidth[column])
+                        avg_width[column] for column in columns if width[column] < self.maxwidth[column])
                     for column in columns:
-                        if self.width[pageindex][column] < self.maxwidth[column]:
-                            width_ratio = math.ceil(
-                                remain_width * (self.get_avg_content_width(column) / tot_avg_content_width))
-                            # width_ratio = math.ceil(
-                            #    remain_width * (self.get_max_content_width(column) / tot_max_content_width))
-                            self.set_width(pageindex, column, max(min(self.width[pageindex][column] + width_ratio
-                                                                      , self.maxwidth[column]
-                                                                      , self.get_pref_width(column) if any(
-                                    self.width[pageindex][column] < self.get_pref_width(column) for column in
-                                    columns) else
-                                                                      self.maxwidth[column]
-                                                                      , self.width[pageindex][column] + linesize - sum(
-                                    [self.width[pageindex][column] + self.spacing[column] for column in columns])
-                                                                      , linesize - self.spacing[column]),
-                                                                  self.get_pref_min_width(column)))
-
-                    tot_used_width = sum([self.width[pageindex][column] + self.spacing[column] for column in columns])
+                        if width[column] < self.maxwidth[column]:
+                            width_ratio = math.ceil(remain_width * (avg_width[column] / tot_avg_content_width))
+                            self.set_width(pageindex, column, max(min(width[column] + width_ratio,
+                                                                      self.maxwidth[column],
+                                                                      pref_width[column] if any(
+                                                                          width[col] < pref_width[col] for col in
+                                                                          columns) else self.maxwidth[column],
+                                                                      width[column] + linesize - sum(
+                                                                          [width[col] + self.spacing[col] for col in
+                                                                           columns]),
+                                                                      linesize - self.spacing[column]),
+                                                                  pref_min_width[column]))
+
+                    tot_used_width = sum([width[column] + self.spacing[column] for column in columns])
                     remain_width = linesize - tot_used_width
 
             if tot_used_width > linesize:
                 excess_width = tot_used_width - linesize
-                while excess_width > 0 and any(
-                        self.width[pageindex][column] > self.get_pref_min_width(column) for column in columns):
-                    tot_max_content_width = sum(
-                        self.get_max_content_width(column) for column in columns if
-                        self.width[pageindex][column] > self.get_pref_min_width(column))
+                while excess_width > 0 and any(width[column] > pref_min_width[column] for column in columns):
                     tot_avg_content_width = sum(
-                        self.get_avg_content_width(column) for column in columns if
-                        self.width[pageindex][column] > self.get_pref_min_width(column))
-                    wgt_divisor = len(
-                        [column for column in columns if
-                         self.width[pageindex][column] > self.get_pref_min_width(column)]) - 1
-                    for i, column in enumerate(columns):
-                        if self.width[pageindex][column] > self.get_pref_min_width(column):
-                            # print(tot_max_content_width, self.get_max_content_width(column), wgt_divisor)
-                            # if wgt_divisor > 0:
-                            #     width_ratio = math.ceil(
-                            #         excess_width * ((
-                            #                                 tot_max_content_width - self.get_max_content_width(column)) / tot_max_content_width) / wgt_divisor)
-                            # else:
-                            #     width_ratio = excess_width
-                            # width_ratio = math.ceil(
-                            #    excess_width * (self.get_max_content_width(column) / tot_max_content_width))
-                            width_ratio = math.ceil(
-                                excess_width * (self.get_avg_content_width(column) / tot_avg_content_width))
+                        avg_width[column] for column in columns if width[column] > pref_min_width[column])
+                    for column in columns:
+                        if width[column] > pref_min_width[column]:
+                            width_ratio = math.ceil(excess_width * (avg_width[column] / tot_avg_content_width))
                             self.set_width(pageindex, column,
-                                           min(max(self.width[pageindex][column] - width_ratio,
-                                                   self.width[pageindex][column] - excess_width,
-                                                   self.width[pageindex][column] + linesize - sum(
-                                                       [self.width[pageindex][column] + self.spacing[column] for column
-                                                        in
-                                                        columns]),
-                                                   self.get_pref_min_width(column),
-                                                   self.get_pref_width(column) if any(
-                                                       self.width[pageindex][column] > self.get_pref_width(column) for
-                                                       column in
-                                                       columns) else self.get_pref_min_width(column)),
+                                           min(max(width[column] - width_ratio,
+                                                   width[column] - excess_width,
+                                                   width[column] + linesize - sum(
+                                                       [width[col] + self.spacing[col] for col in columns]),
+                                                   pref_min_width[column],
+                                                   pref_width[column] if any(
+                                                       width[col] > pref_width[col] for col in
+                                                       columns) else pref_min_width[column]),
                                                linesize - self.spacing[column], self.maxwidth[column]))
 
-                    tot_used_width = sum([self.width[pageindex][column] + self.spacing[column] for column in columns])
+                    tot_used_width = sum([width[column] + self.spacing[column] for column in columns])
                     excess_width = tot_used_width - linesize
 
                 if excess_width > 0:
@@ -455,8 +757,102 @@ class Columns(Cells):
                     self.recurse([cols1, self.idcols + cols2], linesize=linesize, depth=depth + 1)
         return
 
-    def calculate_width(self, linesize):
-        self.recurse([self.colorder], linesize=linesize, depth=-1)
+    def waterfill(self, columns, room, amount):
+        """Splits amount over columns in proportion to their average content width, giving no column more than its
+        room, and rounds the shares to integers that add up to the amount handed out
+        """
+        share = {}
+        active = [column for column in columns if room[column] > 0]
+        remaining = amount
+        while active and remaining > 0:
+            weight = {column: self.get_avg_content_width(column) for column in active}
+            tot_weight = sum(weight.values())
+            if tot_weight == 0:
+                weight = {column: 1 for column in active}
+                tot_weight = len(active)
+
+            capped = [column for column in active if remaining * weight[column] / tot_weight >= room[column]]
+            if not capped:
+                for column in active:
+                    share[column] = remaining * weight[column] / tot_weight
+                remaining = 0
+            else:
+                for column in capped:
+                    share[column] = room[column]
+                    remaining -= room[column]
+                active = [column for column in active if column not in capped]
+
+        delta = {column: math.floor(share.get(column, 0)) for column in columns}
+        leftover = amount - max(remaining, 0) - sum(delta.values())
+        for column in sorted(share, key=lambda column: delta[column] - share[column]):
+            if leftover <= 0:
+                break
+            if delta[column] < room[column]:
+                delta[column] += 1
+                leftover -= 1
+
+        return delta
+
+    def allocate(self, pageindex, columns, linesize):
+        width = self.width[pageindex] = {column: self.get_pref_width(column) for column in columns}
+        avail_width = linesize - sum(self.spacing[column] for column in columns)
+        tot_width = sum(width.values())
+
+        if tot_width < avail_width:
+            room = {column: self.maxwidth[column] - width[column] for column in columns}
+            for column, delta in self.waterfill(columns, room, avail_width - tot_width).items():
+                width[column] += delta
+        elif tot_width > avail_width:
+            room = {column: max(width[column] - self.get_pref_min_width(column), 0) for column in columns}
+            for column, delta in self.waterfill(columns, room, tot_width - avail_width).items():
+                width[column] -= delta
+
+    def solve(self, linesize):
+        self.pages = {}
+        self.width = {}
+        columns = tuple(self.colorder)
+
+        while columns:
+            # Keep as many columns as fit at their preferred minimum width, but always at least one column besides the
+            # idcols, so every page makes progress
+            used_width = 0
+            ncols = 0
+            for column in columns:
+                used_width += min(self.get_pref_min_width(column), self.maxwidth[column]) + self.spacing[column]
+                if used_width > linesize:
+                    break
+                ncols += 1
+            ncols = min(max(ncols, len(self.idcols) + 1), len(columns))
+
+            pageindex = len(self.pages)
+            self.pages[pageindex] = columns[:ncols]
+            self.allocate(pageindex, columns[:ncols], linesize)
+            columns = self.idcols + columns[ncols:] if ncols < len(columns) else tuple()
+
+        return
+
+    def calculate_width(self, linesize, allocator='recurse'):
+        """Allocates column widths and splits columns into pages that fit in linesize
+
+        allocator='recurse' runs the iterative shrink/grow passes. allocator='waterfill' solves each page directly:
+        the columns start at their preferred width and the free (or missing) width is shared in proportion to the
+        average content width, bounded by the max width (or the preferred minimum width). Widths differ from 'recurse'
+        where its ceil rounding overshoots, and on split pages, where 'recurse' regrows columns from their shrunk width
+        and 'waterfill' starts again from the preferred width. 'waterfill' keeps idcols plus at least one column on
+        every page, where 'recurse' does not terminate if the idcols alone do not fit.
+
+        Pages and widths are laid out again from the preferred widths, so calling it again gives the same pages.
+        """
+        if allocator == 'recurse':
+            # recurse grows pages and widths in place, it starts from one page at the preferred widths
+            self.pages = {0: self.colorder}
+            self.width = {0: {column: self.get_pref_width(column) for column in self.colorder}}
+            self.recurse([self.colorder], linesize=linesize, depth=-1)
+        elif allocator == 'waterfill':
+            self.solve(linesize)
+        else:
+            raise ValueError(f"unknown allocator '{allocator}'")
+        self.generation += 1
         return self
 
     # def get_rows(self, pageindex):
@@ -539,32 +935,45 @@ class Row():
 
 
 class RowLabel():
-    def __init__(self, *labels, print_index=0):
+    def __init__(self, *labels, print_index=0, print_width=90, layouts=None):
         self._labels = labels
         self.print_index = print_index
+        self.print_width = print_width
+        self._layouts = layouts
 
     def __repr__(self):
-        self.labels.__repr__()
+        return self._labels.__repr__()
 
     @property
     def labels(self):
-        return (Cell(label, print_width=90) for label in self._labels)
+        return (Cell(label, print_width=self.print_width, initial_indent=i * '  ') for i, label in
+                enumerate(self._labels))
 
     @labels.setter
     def labels(self, value):
         self._labels = tuple(value)
+        self._layouts = None
+
+    @property
+    def layouts(self):
+        # Each label wrapped once, at the indent it is printed with
+        if self._layouts is None:
+            self._layouts = tuple(CellLayout.of(label, self.print_width) for label in self.labels)
+
+        return self._layouts
+
+    def reprint(self, print_index=0):
+        return RowLabel(*self._labels, print_index=print_index, print_width=self.print_width, layouts=self._layouts)
 
     @property
     def max_lines(self):
-        return sum(label.max_lines for i, label in enumerate(self.labels) if i >= self.print_index)
+        return sum(layout.max_lines for layout in self.layouts[self.print_index:])
 
     def write(self, file):
-        for i, label in enumerate(self.labels):
-            if i >= self.print_index:
-                label.initial_indent = i*'  '
-                label.write(file)
-
-            # file.write('\n')
+        for layout in self.layouts[self.print_index:]:
+            for i in range(layout.max_lines):
+                layout.write_line(i, file)
+                file.write('\n')
 
 
 class RowGroup:
@@ -572,9 +981,13 @@ class RowGroup:
         self.rows = rows
         self.rowlabel = rowlabel
 
+    @property
+    def rows_lines(self):
+        return sum(row.max_lines for row in self.rows)
+
     @property
     def max_lines(self):
-        return sum(row.max_lines for row in self.rows) + self.rowlabel.max_lines
+        return self.rows_lines + self.rowlabel.max_lines
 
 # import lorem
 # testcells = ()
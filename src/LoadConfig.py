@@ -0,0 +1,108 @@
+import configparser
+import os
+from configparser import NoSectionError
+
+
+class ConfigParser(configparser.ConfigParser):
+    """Can get options() without defaults
+    """
+    def options(self, section, no_defaults=False, **kwargs):
+        if no_defaults:
+            try:
+                return list(self._sections[section].keys())
+            except KeyError:
+                raise NoSectionError(section)
+        else:
+            return super().options(section, **kwargs)
+
+
+class Section(dict):
+    """Section values where some values failed to interpolate, looking one of those up raises its error as the
+    configparser lookup would
+    """
+    def __init__(self, values, errors):
+        super().__init__(values)
+        self.errors = errors
+
+    def __getitem__(self, key):
+        if key in self.errors:
+            raise self.errors[key]
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key in self.errors:
+            raise self.errors[key]
+        return super().get(key, default)
+
+
+def _section(proxy):
+    # Values are interpolated one by one, so a bad value (e.g. a bare %) only fails its own lookups
+    values, errors = {}, {}
+    for key in proxy:
+        try:
+            values[key] = proxy[key]
+        except configparser.InterpolationError as e:
+            errors[key] = e
+
+    return Section(values, errors) if errors else values
+
+
+class ParsedConfig:
+    """Config file parsed once into plain dicts
+
+    Each section dict includes the defaults, as a configparser section lookup does.
+    """
+    def __init__(self, config):
+        self.default_section = config.default_section
+        self.defaults = _section(config[config.default_section])
+        self.sections = {}
+        self._options = {}
+        for section in config.sections():
+            self.sections[section] = _section(config[section])
+            self._options[section] = tuple(config.options(section, no_defaults=True))
+
+    def __contains__(self, section):
+        return section == self.default_section or section in self.sections
+
+    def has_section(self, section):
+        return section in self.sections
+
+    def section(self, section):
+        return self.sections.get(section, self.defaults)
+
+    def options(self, section):
+        return self._options[section] if section in self._options else tuple(self.defaults.keys())
+
+
+class ConfigRegistry:
+    """Shared cache of parsed config files, reparsed only when the file's mtime changes
+    """
+    def __init__(self):
+        self._configs = {}
+        self.reads = 0
+
+    def _parse(self, configfile, delimiters, encoding):
+        config = ConfigParser(delimiters=delimiters)
+        config.optionxform = lambda option: option
+        config.read(configfile, encoding=encoding)
+        self.reads += 1
+        return ParsedConfig(config)
+
+    def get(self, configfile, delimiters=('=', ':'), encoding=None):
+        key = (configfile, delimiters, encoding)
+        try:
+            mtime = os.stat(configfile).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        cached = self._configs.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = self._configs[key] = (mtime, self._parse(configfile, delimiters, encoding))
+
+        return cached[1]
+
+    def clear(self):
+        self._configs.clear()
+
+
+registry = ConfigRegistry()
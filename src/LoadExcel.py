@@ -1,18 +1,35 @@
-import pandas as pd
 from src.Table import *
 
-shoes = pd.read_excel(r"C:\Users\sasg\PycharmProjects\test\src\assets\SHOES.xlsx", 'SHOES')
-shoes.sort_values(by=['Region', 'Product', 'Subsidiary'], axis=0, inplace=True, ascending=True)
 
-page = Page(95, 50)
-table = Table(Columns(
-    *(Cell(shoes.loc[row, column], colindex=column, rowindex=row) for column in shoes.columns for row in shoes.index),
-    colorder=tuple(shoes.columns), idcols=('Region', 'Product', 'Subsidiary'), label=tuple(shoes.columns), wrap=False, wrap_header=False,
-    spacing=(0, 1, 1, 1, 1, 1, 1), minwidth=10, just='<'), page=page,
-              title='This is a title',
-              footnotes=["This is a footnote", (datetime.now().strftime("%d%b%Y:%H:%M:%S").upper(), '>')], double_spaced=False)
-#table.columns.calculate_width(table.page.linesize)
+def main(argv=None):
+    import argparse
+    import pandas as pd
 
-with open(r'C:\Users\sasg\PycharmProjects\report\src\output\test.txt', 'w') as fl:
-    table.print_table(fl)
+    parser = argparse.ArgumentParser(prog='python -m src.LoadExcel', description='Renders an Excel sheet as a text table')
+    parser.add_argument('excel', help='Excel workbook')
+    parser.add_argument('--sheet', default='SHOES', help='sheet (default: %(default)s)')
+    parser.add_argument('--idcols', nargs='+', default=['Region', 'Product', 'Subsidiary'],
+                        help='id columns, also the sort order')
+    parser.add_argument('--linesize', type=int, default=95)
+    parser.add_argument('--pagesize', type=int, default=50)
+    parser.add_argument('-o', '--output', default=r'./output/test.txt')
+    args = parser.parse_args(argv)
 
+    shoes = pd.read_excel(args.excel, args.sheet)
+    shoes.sort_values(by=args.idcols, axis=0, inplace=True, ascending=True)
+
+    page = Page(args.linesize, args.pagesize)
+    table = Table(Columns(
+        *(Cell(shoes.loc[row, column], colindex=column, rowindex=row) for column in shoes.columns for row in shoes.index),
+        colorder=tuple(shoes.columns), idcols=tuple(args.idcols), label=tuple(shoes.columns), wrap=False, wrap_header=False,
+        spacing=(0,) + (1,) * (len(shoes.columns) - 1), minwidth=10, just='<'), page=page,
+                  title='This is a title',
+                  footnotes=["This is a footnote", (datetime.now().strftime("%d%b%Y:%H:%M:%S").upper(), '>')], double_spaced=False)
+    #table.columns.calculate_width(table.page.linesize)
+
+    with open(args.output, 'w') as fl:
+        table.print_table(fl)
+
+
+if __name__ == '__main__':
+    main()
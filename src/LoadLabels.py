@@ -1,5 +1,5 @@
-import configparser
 import math
+from src.LoadConfig import registry
 
 class LoadLabels:
     def __init__(self, labelconfig = None, labelsection="DEFAULT", labelorderconfig = None, labelordersection="DEFAULT"):
@@ -7,18 +7,21 @@ class LoadLabels:
         self.labelsection = labelsection
         self.labelorderconfig = labelorderconfig
         self.labelordersection= labelordersection
+        self._seen = {}
 
     def _readconfig(self, configfile):
-        config = configparser.ConfigParser(delimiters=('~', '@'))
-        config.optionxform = lambda option: option
-        config.read(configfile, encoding='UTF-8')
-        return config
+        return registry.get(configfile, delimiters=('~', '@'), encoding='UTF-8')
 
     def get_formatted_label(self, label):
         config = self._readconfig(self.labelconfig)
 
-        return config[self.labelsection if self.labelsection in config else config.default_section].get(label, label)
+        return config.section(self.labelsection).get(label, label)
 
     def get_label_order(self, label):
+        # Without a label order config labels sort in the order they are first seen
+        if self.labelorderconfig is None:
+            return float(self._seen.setdefault((self.labelordersection, label), len(self._seen)))
+
         config = self._readconfig(self.labelorderconfig)
-        return config[self.labelordersection if self.labelordersection in config else config.default_section].getfloat(label, math.inf)
\ No newline at end of file
+        order = config.section(self.labelordersection).get(label)
+        return float(order) if order is not None else math.inf
\ No newline at end of file
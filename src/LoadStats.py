@@ -1,17 +1,22 @@
-import configparser
-from configparser import NoSectionError
+from src.LoadConfig import registry
 
-class ConfigParser(configparser.ConfigParser):
-    """Can get options() without defaults
+
+class StatTemplate:
+    """One stat-template-config entry, e.g. ``mean, std = {} ({})``, with its label and value formatters resolved
     """
-    def options(self, section, no_defaults=False, **kwargs):
-        if no_defaults:
-            try:
-                return list(self._sections[section].keys())
-            except KeyError:
-                raise NoSectionError(section)
-        else:
-            return super().options(section, **kwargs)
+    def __init__(self, key, template, labels, formats):
+        self.key = key
+        self.template = template
+        self.statnames = tuple(string.strip() for string in key.split(','))
+        self.label = template.format(*(labels.get(stat, stat) for stat in self.statnames))
+        self.formatters = tuple((stat, formats.get(stat, '{}').format) for stat in self.statnames)
+
+    def format(self, stats):
+        # Strings come already formatted, e.g. from CatgoSummary(number='string'), and are written as they are
+        return self.template.format(
+            *((value if isinstance(value, str) else formatter(value)) if (value := stats.get(stat, None)) is not None
+              else '-' for stat, formatter in self.formatters))
+
 
 class LoadStats:
     def __init__(self, stats=None, labelconfig=None, labelsection="DEFAULT", formatconfig=None, formatsection="DEFAULT",
@@ -23,48 +28,40 @@ class LoadStats:
         self.formatsection = formatsection
         self.templateconfig = templateconfig
         self.templatesection = templatesection
+        self._templates = {}
 
     def _readconfig(self, configfile):
-        config = ConfigParser()
-
-        config.optionxform = lambda option: option
-        config.read(configfile)
-        return config
+        return registry.get(configfile)
 
-    def _formatlabel(self, stat):
-        config = self._readconfig(self.labelconfig)
+    def gettemplates(self):
+        templateconfig = self._readconfig(self.templateconfig)
+        labelconfig = self._readconfig(self.labelconfig)
+        formatconfig = self._readconfig(self.formatconfig)
 
-        return config[self.labelsection if self.labelsection in config else config.default_section].get(stat, stat)
+        # Compiled per section and per parsed config, so a reloaded config file is compiled again
+        cachekey = (templateconfig, self.templatesection, labelconfig, self.labelsection, formatconfig,
+                    self.formatsection)
+        templates = self._templates.get(cachekey)
+        if templates is None:
+            templatesection = templateconfig.section(self.templatesection)
+            labels = labelconfig.section(self.labelsection)
+            formats = formatconfig.section(self.formatsection)
+            templates = self._templates[cachekey] = tuple(
+                StatTemplate(key, templatesection[key], labels, formats) for key in
+                templateconfig.options(self.templatesection))
 
-    def _formatvalue(self, stat, value):
-        config = self._readconfig(self.formatconfig)
-
-        if value is not None:
-            return config[self.formatsection if self.formatsection in config else config.default_section].get(stat,
-                                                                                                              '{}').format(
-                value)
-        else:
-            return '-'
-
-    def _applytemplatetolabel(self, key):
-        config = self._readconfig(self.templateconfig)
-        return config[self.templatesection if self.templatesection in config else config.default_section][key].format(
-            *(self._formatlabel(string.strip()) for string in key.split(',')))
-
-    def _applytemplatetovalue(self, key):
-        config = self._readconfig(self.templateconfig)
-        return config[self.templatesection if self.templatesection in config else config.default_section][key].format(
-            *(self._formatvalue(string.strip(), self.stats.get(string.strip(), None)) for string in key.split(',')))
+        return templates
 
     def getstats(self):
-        config = self._readconfig(self.templateconfig)
+        return ((template.label, template.format(self.stats), i) for i, template in enumerate(self.gettemplates()))
+
+    def getbatchstats(self, statslist):
+        """getstats() of each stat dict of statslist, all formatted with the templates of the current sections
+        """
+        templates = tuple(enumerate(self.gettemplates()))
 
-        if config.has_section(self.templatesection):
-            return ((self._applytemplatetolabel(key), self._applytemplatetovalue(key), i) for i, key in
-                    enumerate(config.options(self.templatesection, no_defaults=True)))
-        else:
-            return ((self._applytemplatetolabel(key), self._applytemplatetovalue(key), i) for i, key in
-                    enumerate(config[config.default_section].keys()))
+        return [tuple((template.label, template.format(stats), i) for i, template in templates) for stats in
+                statslist]
 
 
 # stats = LoadStats(configfile=r"C:\Users\sasg\PycharmProjects\report\src\output\config.txt", stats={
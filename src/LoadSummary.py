@@ -1,14 +1,71 @@
-import simplejson as json
 from src.Table import *
 from src.LoadStats import *
 from decimal import Decimal
 from operator import itemgetter
+from itertools import groupby
 from src.LoadLabels import *
+import numbers
+
+
+def _loaded(value):
+    """value as json.load(..., use_decimal=True) reads it back after write_summary wrote it
+    """
+    if value is None or isinstance(value, (bool, str, Decimal)):
+        return value
+    elif isinstance(value, numbers.Integral):
+        return int(value)
+    elif isinstance(value, numbers.Real):
+        return Decimal(repr(float(value)))
+    return value
+
+
+def loaded_records(summary):
+    """Records of a NumericSummary/CatgoSummary result with the keys and values a JSON round-trip would give, so cells
+    built from them are the same as those built from the JSON file
+    """
+    records = []
+    for record in summary.get('summary', [{}]):
+        record = dict(record)
+        if 'statistics' in record:
+            record['statistics'] = {str(stat): _loaded(value) for stat, value in record['statistics'].items()}
+        if 'rows' in record:
+            record['rows'] = {str(row): {str(stat): _loaded(value) for stat, value in statdict.items()} for
+                              row, statdict in record['rows'].items()}
+        records.append(record)
+
+    return records
+
+
+def _jsondefault(obj):
+    # numpy scalars and arrays, as lists and plain numbers
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def write_summary(summary, file):
+    """Writes a NumericSummary/CatgoSummary result to a .json or .npz file LoadSummary can read
+
+    Used by both LoadSummary and the calculate_summary/calculate_catgo_summary scripts. It never imports pandas, and
+    imports simplejson or numpy only when it writes a .json or .npz file.
+    """
+    if str(file).endswith('.npz'):
+        from src.SummaryArrays import write_summary as write_arrays
+        write_arrays(summary, file)
+    else:
+        import simplejson as json
+        with open(file, 'w') as fl:
+            json.dump(summary, fl, default=_jsondefault, use_decimal=True)
 
 
 class LoadSummary:
     def __init__(self, jsonfile, statlabelconfig, statformatconfig, stattemplateconfig, statsectionindex, colindex,
-                 sortindex, noprintindex, rowgrplevels, labelconfig, labelorderconfig=None, labelsectionindex=None, printanavar=True):
+                 sortindex, noprintindex, rowgrplevels, labelconfig, labelorderconfig=None, labelsectionindex=None,
+                 printanavar=True, summary=None):
+        """Records are read from jsonfile (.json or .npz), or taken from an in-memory summary as returned by
+        NumericSummary.numericsummary()/CatgoSummary.catgosummary(). With a summary, jsonfile is optional and is written
+        as a side artifact when given.
+        """
         self.jsonfile = jsonfile
         self.loadstats = LoadStats(labelconfig=statlabelconfig, formatconfig=statformatconfig,
                                    templateconfig=stattemplateconfig)
@@ -21,11 +78,25 @@ class LoadSummary:
         self.rowgrplevels = rowgrplevels
         self.printanavar = printanavar
 
-        with open(self.jsonfile, 'r') as fl:
-            try:
-                self.summary = json.load(fl, use_decimal=True).get('summary', [{}])
-            except json.JSONDecodeError:
-                print("invalid JSON")
+        if summary is not None:
+            if self.jsonfile is not None:
+                write_summary(summary, self.jsonfile)
+            self.summary = loaded_records(summary)
+        elif str(self.jsonfile).endswith('.npz'):
+            from src.SummaryArrays import read_summary
+            self.summary = read_summary(self.jsonfile)
+        else:
+            # simplejson is only imported to read JSON, building from an in-memory summary or .npz doesn't need it
+            import simplejson as json
+            with open(self.jsonfile, 'r') as fl:
+                try:
+                    self.summary = json.load(fl, use_decimal=True).get('summary', [{}])
+                except json.JSONDecodeError:
+                    print("invalid JSON")
+
+    @classmethod
+    def from_summary(cls, summary, jsonfile=None, **kwargs):
+        return cls(jsonfile, summary=summary, **kwargs)
 
     def _getindexlabel(self, index, indexvar, rowgrplevels, anavar, loadlabels):
         loadlabels.labelsection = anavar
@@ -89,92 +160,101 @@ class LoadSummary:
     #     return sorted(summary, key=key)
 
     def _loadcategoric(self):
-        cells = tuple()
+        # Keys mirror Cell.__eq__/__hash__, so the duplicate check is a set lookup instead of a scan over all cells
+        cells = []
+        seen = set()
         # roworderlookup = self._orderrows(self._getallrows(self.summary))
-        for record in self.summary:
+        for anavar, records in groupby(self.summary, key=itemgetter('anavar')):
             # self.loadstats.formatsection = record['index'][self.statsectionindex]
             # self.loadstats.templatesection = record['index'][self.statsectionindex]
-            self.loadstats.labelsection = record['anavar']
-            self.loadstats.formatsection = record['anavar']
-            self.loadstats.templatesection = record['anavar']
-            self.loadlabels.labelsection = record['indexvar']
-
-            # roworder = 0
-            # keys_wo_col = tuple(record['index'][:self.colindex] + record['index'][self.colindex + 1:])
-            # keys_wo_col = tuple(record['index'][i] for i in range(len(record['index'])) if
-            #                     i not in (self.colindex,) + self.noprintindex)
-            #
-            # if keys_wo_col != prevkeys_wo_col:
-            #     keyorder += 1
-
-            keylabels = self._getindexlabel(record['index'], record['indexvar'], self.rowgrplevels, record['anavar'], self.loadlabels)
-            print(keylabels)
-
-            for row, statdict in record['rows'].items():
-                self.loadstats.stats = statdict
-                stats = self.loadstats.getstats()
-                for stat in stats:
-                    # keylabels = tuple(self.loadlabels.get_formatted_label(key) for key in keys_wo_col)
-                    self.loadlabels.labelsection = record['anavar']
-                    rowlabel = self.loadlabels.get_formatted_label(row)
-
-                    # rowindex = roworderlookup[(tuple(
-                    #     (index if i not in (self.colindex,) else None for i, index in enumerate(record['index']))),) + (
-                    #                               row,)]
-
-                    indexorder = self._getindexorder(tuple(
-                        (index if i not in (self.colindex,) else None for i, index in enumerate(record['index']))),
-                        record['indexvar'], self.sortindex, record['anavar'], self.loadlabels)
-
-                    self.loadlabels.labelordersection = record['anavar']
-                    rowindex = indexorder + (self.loadlabels.get_label_order(row),)
-
-                    if Cell(rowlabel, colindex="stats",
-                            rowindex=rowindex,
-                            label=keylabels) not in cells:
-                        cells = cells + (
-                            Cell(rowlabel, colindex="stats",
-                                 rowindex=rowindex,
-                                 label=keylabels, initial_indent=(len(keylabels) * '  ')),)
-                    cells = cells + (Cell(stat[1], colindex=record['index'][self.colindex],
+            self.loadstats.labelsection = anavar
+            self.loadstats.formatsection = anavar
+            self.loadstats.templatesection = anavar
+            # The stats of all rows of a run of records of one anavar are formatted in one call
+            records = list(records)
+            batch = iter(self.loadstats.getbatchstats(
+                [statdict for record in records for statdict in record['rows'].values()]))
+            for record in records:
+                self.loadlabels.labelsection = record['indexvar']
+
+                # roworder = 0
+                # keys_wo_col = tuple(record['index'][:self.colindex] + record['index'][self.colindex + 1:])
+                # keys_wo_col = tuple(record['index'][i] for i in range(len(record['index'])) if
+                #                     i not in (self.colindex,) + self.noprintindex)
+                #
+                # if keys_wo_col != prevkeys_wo_col:
+                #     keyorder += 1
+
+                keylabels = self._getindexlabel(record['index'], record['indexvar'], self.rowgrplevels,
+                                                record['anavar'], self.loadlabels)
+                print(keylabels)
+
+                for row in record['rows']:
+                    stats = next(batch)
+                    for stat in stats:
+                        # keylabels = tuple(self.loadlabels.get_formatted_label(key) for key in keys_wo_col)
+                        self.loadlabels.labelsection = record['anavar']
+                        rowlabel = self.loadlabels.get_formatted_label(row)
+
+                        # rowindex = roworderlookup[(tuple(
+                        #     (index if i not in (self.colindex,) else None for i, index in
+                        #      enumerate(record['index']))),) + (row,)]
+
+                        indexorder = self._getindexorder(tuple(
+                            (index if i not in (self.colindex,) else None for i, index in enumerate(record['index']))),
+                            record['indexvar'], self.sortindex, record['anavar'], self.loadlabels)
+
+                        self.loadlabels.labelordersection = record['anavar']
+                        rowindex = indexorder + (self.loadlabels.get_label_order(row),)
+
+                        if (rowlabel, rowindex, "stats") not in seen:
+                            seen.add((rowlabel, rowindex, "stats"))
+                            cells.append(
+                                Cell(rowlabel, colindex="stats",
+                                     rowindex=rowindex,
+                                     label=keylabels, initial_indent=(len(keylabels) * '  ')))
+                        seen.add((stat[1], rowindex, record['index'][self.colindex]))
+                        cells.append(Cell(stat[1], colindex=record['index'][self.colindex],
                                           rowindex=rowindex,
-                                          label=keylabels),)
+                                          label=keylabels))
 
-        return cells
+        return tuple(cells)
 
     def _loadnumeric(self):
-        cells = tuple()
+        cells = []
+        seen = set()
         # roworderlookup = self._orderrows(self._getallrows(self.summary))
-        for record in self.summary:
-            self.loadstats.stats = record['statistics']
-            self.loadstats.labelsection = record['anavar']
-            self.loadstats.formatsection = record['anavar']
-            self.loadstats.templatesection = record['anavar']
+        for anavar, records in groupby(self.summary, key=itemgetter('anavar')):
+            self.loadstats.labelsection = anavar
+            self.loadstats.formatsection = anavar
+            self.loadstats.templatesection = anavar
+
+            # The stats of a run of records of one anavar are formatted in one call
+            records = list(records)
+            batch = self.loadstats.getbatchstats([record['statistics'] for record in records])
+            for record, stats in zip(records, batch):
+                keylabels = self._getindexlabel(record['index'], record['indexvar'], self.rowgrplevels,
+                                                record['anavar'], self.loadlabels)
+                print(keylabels)
+                indexorder = self._getindexorder(tuple(
+                    (index if i not in (self.colindex,) else None for i, index in enumerate(record['index']))),
+                    record['indexvar'], self.sortindex, record['anavar'], self.loadlabels)
 
-            stats = self.loadstats.getstats()
-
-            keylabels = self._getindexlabel(record['index'], record['indexvar'], self.rowgrplevels, record['anavar'],
-                                            self.loadlabels)
-            print(keylabels)
-            indexorder = self._getindexorder(tuple(
-                (index if i not in (self.colindex,) else None for i, index in enumerate(record['index']))),
-                record['indexvar'], self.sortindex, record['anavar'], self.loadlabels)
-
-            for stat in stats:
-                rowindex = indexorder + (f'{stat[2]:0>5}',)
+                for stat in stats:
+                    rowindex = indexorder + (f'{stat[2]:0>5}',)
 
-                if Cell(stat[0], colindex="stats",
-                        rowindex=rowindex,
-                        label=keylabels) not in cells:
-                    cells = cells + (
-                        Cell(stat[0], colindex="stats",
-                             rowindex=rowindex,
-                             label=keylabels, initial_indent=(len(keylabels) * '  ')),)
-                cells = cells + (Cell(stat[1], colindex=record['index'][self.colindex],
+                    if (stat[0], rowindex, "stats") not in seen:
+                        seen.add((stat[0], rowindex, "stats"))
+                        cells.append(
+                            Cell(stat[0], colindex="stats",
+                                 rowindex=rowindex,
+                                 label=keylabels, initial_indent=(len(keylabels) * '  ')))
+                    seen.add((stat[1], rowindex, record['index'][self.colindex]))
+                    cells.append(Cell(stat[1], colindex=record['index'][self.colindex],
                                       rowindex=rowindex,
-                                      label=keylabels),)
+                                      label=keylabels))
 
-        return cells
+        return tuple(cells)
 
     def getcells(self):
         keyorder = 0
@@ -213,40 +293,67 @@ class LoadSummary:
         return cells
 
 
-mydata = LoadSummary(jsonfile=r'.\output\json\test.json',
-                     statlabelconfig=r'./output/stat-label-config.txt',
-                     statformatconfig=r'./output/stat-format-config.txt',
-                     stattemplateconfig=r'./output/stat-template-config.txt',
-                     statsectionindex=0,
-                     colindex=0,
-                     sortindex=(1,),
-                     noprintindex=tuple(),
-                     rowgrplevels=(1,),
-                     labelconfig=r'./output/label-config.txt',
-                     labelorderconfig=r'./output/label-order-config.txt',
-                     labelsectionindex=0,
-                     printanavar=True)
-
-page = Page(89, 45)
-table = Table(Columns(
-    *mydata._loadnumeric(),
-    colorder=('stats', '0.15 mg/kg', '0.20 mg/kg', '0.25 mg/kg'), wrap=False, wrap_header=False,
-    just=('<', '^', '^', '>', '^'), label=(None, '0.15 mg/kg', '0.20 mg/kg', '0.25 mg/kg'), idcols=('stats',),
-    spacing=(0, 1, 1, 1, 1)), page=page,
-    title='This is a title~Another title',
-    footnotes=["This is a footnote", (datetime.now().strftime("%d%b%Y:%H:%M:%S").upper(), '>')], double_spaced=False)
-# table.columns.calculate_width(table.page.linesize)
-# print(table.columns.width)
-
-with open(r'C:\Users\sasg\PycharmProjects\report\src\output\test.txt', 'w') as fl:
-    table.print_table(fl)
-#
-# width = {'stats': 10, "0.15 mg/kg": 10, "0.20 mg/kg": 10, "0.25 mg/kg": 10}
-# test = Cells(*mydata.getcells())
-# test.set_cell_width(width)
-#
-# for group in test.getrowgroup('stats', "0.15 mg/kg", "0.20 mg/kg", "0.25 mg/kg", width=width):
-#     for cell in group.rowlabel.labels:
-#         print(cell)
-#     for row in group.rows:
-#         print(row)
+
+def main(argv=None):
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(prog='python -m src.LoadSummary',
+                                     description='Renders a summary (.json or .npz) as a text table')
+    parser.add_argument('summary', nargs='?', default=r'./output/json/test.json',
+                        help='.json or .npz summary (default: %(default)s)')
+    parser.add_argument('--type', choices=('numeric', 'categorical'), default='numeric')
+    parser.add_argument('--configdir', default=r'./output', help='directory of the stat and label configs')
+    parser.add_argument('--columns', nargs='+', default=['0.15 mg/kg', '0.20 mg/kg', '0.25 mg/kg'])
+    parser.add_argument('--linesize', type=int, default=89)
+    parser.add_argument('--pagesize', type=int, default=45)
+    parser.add_argument('--title', default='This is a title~Another title')
+    parser.add_argument('-o', '--output', default=r'./output/test.txt')
+    args = parser.parse_args(argv)
+
+    config = lambda name: os.path.join(args.configdir, name)
+    mydata = LoadSummary(jsonfile=args.summary,
+                         statlabelconfig=config('stat-label-config.txt'),
+                         statformatconfig=config('stat-format-config.txt'),
+                         stattemplateconfig=config('stat-template-config.txt'),
+                         statsectionindex=0,
+                         colindex=0,
+                         sortindex=(1,),
+                         noprintindex=tuple(),
+                         rowgrplevels=(1,),
+                         labelconfig=config('label-config.txt'),
+                         labelorderconfig=config('label-order-config.txt'),
+                         labelsectionindex=0,
+                         printanavar=True)
+
+    cells = mydata._loadnumeric() if args.type == 'numeric' else mydata._loadcategoric()
+    columns = tuple(args.columns)
+    colorder = ('stats',) + columns
+    page = Page(args.linesize, args.pagesize)
+    table = Table(Columns(
+        *cells,
+        colorder=colorder, wrap=False, wrap_header=False,
+        just=('<', '^', '^', '>', '^')[:len(colorder)] + ('^',) * (len(colorder) - 5), label=(None,) + columns,
+        idcols=('stats',), spacing=(0,) + (1,) * len(columns)), page=page,
+        title=args.title,
+        footnotes=["This is a footnote", (datetime.now().strftime("%d%b%Y:%H:%M:%S").upper(), '>')], double_spaced=False)
+    # table.columns.calculate_width(table.page.linesize)
+    # print(table.columns.width)
+
+    with open(args.output, 'w') as fl:
+        table.print_table(fl)
+
+    #
+    # width = {'stats': 10, "0.15 mg/kg": 10, "0.20 mg/kg": 10, "0.25 mg/kg": 10}
+    # test = Cells(*mydata.getcells())
+    # test.set_cell_width(width)
+    #
+    # for group in test.getrowgroup('stats', "0.15 mg/kg", "0.20 mg/kg", "0.25 mg/kg", width=width):
+    #     for cell in group.rowlabel.labels:
+    #         print(cell)
+    #     for row in group.rows:
+    #         print(row)
+
+
+if __name__ == '__main__':
+    main()
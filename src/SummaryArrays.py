@@ -0,0 +1,167 @@
+import numpy as np
+from decimal import Decimal
+
+
+def _number(value):
+    """Text of value as JSON writes it, and whether JSON reads it back as an integer
+    """
+    if value is None:
+        return '', False
+    elif isinstance(value, Decimal):
+        return str(value), value.is_finite() and value.as_tuple().exponent >= 0
+    elif isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return str(int(value)), True
+    else:
+        return repr(float(value)), False
+
+
+# Kinds of index and statistic values, each read back as JSON reads it
+STR, INT, DECIMAL, NULL, BOOL = range(5)
+
+
+def _index(value):
+    """Kind and text of an index or statistic value
+    """
+    if isinstance(value, str):
+        return STR, value
+    elif isinstance(value, (bool, np.bool_)):
+        return BOOL, 'true' if value else 'false'
+    text, isint = _number(value)
+    return NULL if value is None else INT if isint else DECIMAL, text
+
+
+def _indexvalue(text, kind):
+    if kind == STR:
+        return text
+    elif kind == INT:
+        return int(text)
+    elif kind == DECIMAL:
+        return Decimal(text)
+    elif kind == BOOL:
+        return text == 'true'
+    return None
+
+
+def write_summary(summary, file):
+    """Writes the {'summary': [...]} records of NumericSummary/CatgoSummary to a NumPy .npz file
+
+    Records go into per-record arrays (type, anavar, indexvar, index) and every statistic into one long table (record,
+    row, stat, value), so the file is read back without parsing. Strings are stored once and referenced by code. Values
+    and index values are kept as the text JSON would hold, with an int flag or a kind, so they read back as the same
+    Decimal, int, str or bool.
+    """
+    records = summary.get('summary', [])
+    strings = {}
+
+    def code(string):
+        return strings.setdefault(str(string), len(strings))
+
+    types, anavars, nindex, indexvars, indices, indexkinds = [], [], [], [], [], []
+    recordids, rows, stats, values, valuekinds = [], [], [], [], []
+    for i, record in enumerate(records):
+        types.append(code(record['type']))
+        anavars.append(code(record['anavar']))
+        nindex.append(len(record['index']))
+        indexvars.append([code(var) for var in record['indexvar']])
+        kinds, texts = zip(*map(_index, record['index'])) if record['index'] else ((), ())
+        indices.append([code(text) for text in texts])
+        indexkinds.append(list(kinds))
+
+        if record['type'] == 'numeric':
+            items = (('', stat, value) for stat, value in record['statistics'].items())
+        else:
+            items = ((row, stat, value) for row, statdict in record.get('rows', {}).items() for stat, value in
+                     statdict.items())
+
+        for row, stat, value in items:
+            kind, text = _index(value)
+            recordids.append(i)
+            rows.append(code(row))
+            stats.append(code(stat))
+            values.append(text.encode('utf-8'))
+            valuekinds.append(kind)
+
+    width = max(nindex, default=0)
+    np.savez(file,
+             strings=np.array(list(strings), dtype=str),
+             type=np.array(types, dtype=np.int32),
+             anavar=np.array(anavars, dtype=np.int32),
+             nindex=np.array(nindex, dtype=np.int32),
+             indexvar=np.array([var + [-1] * (width - len(var)) for var in indexvars], dtype=np.int32).reshape(
+                 len(records), width),
+             index=np.array([index + [-1] * (width - len(index)) for index in indices], dtype=np.int32).reshape(
+                 len(records), width),
+             indexkind=np.array([kind + [STR] * (width - len(kind)) for kind in indexkinds], dtype=np.int8).reshape(
+                 len(records), width),
+             record=np.array(recordids, dtype=np.int64),
+             row=np.array(rows, dtype=np.int32),
+             stat=np.array(stats, dtype=np.int32),
+             value=np.array(values, dtype=bytes),
+             valuekind=np.array(valuekinds, dtype=np.int8))
+
+
+class SummaryArrays:
+    """Summary records read from a file written by write_summary
+
+    Behaves as the list of records LoadSummary reads from JSON, with floats as Decimal, integers as int and strings as
+    str, but each record dict is only built when it is accessed.
+    """
+    def __init__(self, file):
+        with np.load(file) as arrays:
+            self.strings = arrays['strings'].astype(object)
+            self.type = arrays['type']
+            self.anavar = arrays['anavar']
+            self.nindex = arrays['nindex']
+            self.indexvar = arrays['indexvar']
+            self.index = arrays['index']
+            # Files written before index kinds were stored hold string index values only
+            self.indexkind = arrays['indexkind'] if 'indexkind' in arrays else np.zeros_like(self.index, dtype=np.int8)
+            record = arrays['record']
+            self.row = arrays['row']
+            self.stat = arrays['stat']
+            self.value = arrays['value']
+            # Files written before value kinds were stored hold numbers only, with an int flag
+            self.valuekind = arrays['valuekind'] if 'valuekind' in arrays else np.where(
+                self.value == b'', NULL, np.where(arrays['isint'], INT, DECIMAL)).astype(np.int8)
+
+        # The long table is written record by record, so each record's statistics are one slice
+        self.bounds = np.searchsorted(record, np.arange(len(self.type) + 1)).tolist()
+
+    def __len__(self):
+        return len(self.type)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        nindex = self.nindex[i]
+        record = {'type': self.strings[self.type[i]], 'anavar': self.strings[self.anavar[i]],
+                  'indexvar': self.strings[self.indexvar[i, :nindex]].tolist(),
+                  'index': list(map(_indexvalue, self.strings[self.index[i, :nindex]].tolist(),
+                                    self.indexkind[i, :nindex].tolist()))}
+
+        start, stop = self.bounds[i], self.bounds[i + 1]
+        values = map(_indexvalue, (text.decode('utf-8') for text in self.value[start:stop].tolist()),
+                     self.valuekind[start:stop].tolist())
+        items = zip(self.strings[self.row[start:stop]].tolist(), self.strings[self.stat[start:stop]].tolist(), values)
+
+        if record['type'] == 'numeric':
+            record['statistics'] = {stat: value for row, stat, value in items}
+        elif start < stop:
+            record['rows'] = {}
+            for row, stat, value in items:
+                record['rows'].setdefault(row, {})[stat] = value
+
+        return record
+
+
+def read_summary(file):
+    return SummaryArrays(file)
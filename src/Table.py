@@ -1,4 +1,9 @@
 from src.Column import *
+import re
+from io import StringIO
+from tempfile import SpooledTemporaryFile
+from bisect import bisect_right
+from itertools import accumulate, islice
 
 
 class Page:
@@ -7,7 +12,72 @@ class Page:
         self.linesize = linesize
 
 
+# Page number tokens for titles and footnotes, e.g. 'Page {page} of {pages}'
+PAGE = '{page}'
+PAGES = '{pages}'
+
+# Titles and footnotes are wrapped with the tokens as runs of these characters, as wide as the page count, so the
+# lines they take don't depend on the numbers written in their place
+_PAGE_MARK = '\uE000'
+_PAGES_MARK = '\uE001'
+_MARKS = re.compile(f'{_PAGE_MARK}+|{_PAGES_MARK}+')
+
+
+def _has_page_numbers(text):
+    return isinstance(text, str) and (PAGE in text or PAGES in text)
+
+
+def _mark_page_numbers(text, digits):
+    if not _has_page_numbers(text):
+        return text
+    return text.replace(PAGE, _PAGE_MARK * digits).replace(PAGES, _PAGES_MARK * digits)
+
+
+def _renumber(text, numbers):
+    # The page number marks of text replaced by numbers, (page, pages)
+    page, pages = str(numbers[0]), str(numbers[1])
+    return _MARKS.sub(lambda match: page if match.group()[0] == _PAGE_MARK else pages, text)
+
+
+class Block:
+    """Lines of a title, footnotes or header, rendered once and written as they are on every page
+
+    Lines with page number marks are kept wrapped but not yet justified, they are justified once the numbers are
+    written in.
+    """
+    def __init__(self, lines=(), max_lines=None):
+        self.lines = list(lines)
+        self.max_lines = len(self.lines) if max_lines is None else max_lines
+
+    @classmethod
+    def of(cls, *cells):
+        lines = []
+        for cell in cells:
+            spacing = ' ' * (cell.spacing if cell.spacing is not None else 0)
+            for text in cell.wrapped_text:
+                if _MARKS.search(text):
+                    lines.append((spacing, text, cell.just, cell.print_width))
+                else:
+                    lines.append(f"{spacing}{text:{cell.just}{cell.print_width}}\n")
+
+        return cls(lines)
+
+    def write(self, file, numbers=None):
+        for line in self.lines:
+            if isinstance(line, str):
+                file.write(line)
+            else:
+                spacing, text, just, print_width = line
+                if numbers is not None:
+                    text = _renumber(text, numbers)
+                file.write(f"{spacing}{text:{just}{print_width}}\n")
+
+
 class Title(Cell):
+    def number_pages(self, digits):
+        self.text = _mark_page_numbers(self.value, digits) if self.value is not None else ''
+        self._wrapped_text = None
+
     def write(self, file):
         if self.content_width > 0:
             super().write(file)
@@ -19,6 +89,7 @@ class Footnotes():
         self.split = split
         self.linesize = linesize
         self._footnotes = footnotes
+        self.digits = None
 
     @property
     def footnotes(self):
@@ -29,9 +100,9 @@ class Footnotes():
             for footer in self._footnotes:
                 if isinstance(footer, (list, tuple)):
                     footnotes = footnotes + (
-                        Cell(footer[0], just=footer[1], split=self.split, print_width=self.linesize),)
+                        Cell(self._mark(footer[0]), just=footer[1], split=self.split, print_width=self.linesize),)
                 else:
-                    footnotes = footnotes + (Cell(footer, split=self.split, print_width=self.linesize),)
+                    footnotes = footnotes + (Cell(self._mark(footer), split=self.split, print_width=self.linesize),)
 
         return footnotes
 
@@ -42,6 +113,18 @@ class Footnotes():
     def __repr__(self):
         return self.footnotes.__repr__()
 
+    def _mark(self, text):
+        return _mark_page_numbers(text, self.digits) if self.digits is not None else text
+
+    @property
+    def has_page_numbers(self):
+        return self._footnotes is not None and not isinstance(self._footnotes, str) and any(
+            _has_page_numbers(footer[0] if isinstance(footer, (list, tuple)) else footer) for footer in
+            self._footnotes)
+
+    def number_pages(self, digits):
+        self.digits = digits
+
     @property
     def max_lines(self):
         return sum(footer.max_lines for footer in self.footnotes)
@@ -51,11 +134,103 @@ class Footnotes():
             footer.write(file)
 
 
+class PageBreak(namedtuple('PageBreak', ('pageindex', 'page', 'start', 'stop', 'lines'))):
+    """Page page of column page pageindex holds row groups start to stop - 1 and takes lines lines, title, header and
+    footnotes included
+    """
+    __slots__ = ()
+
+
+class PagePlan:
+    """Page breaks of one column page
+
+    One pass over the row groups records their heights and first rows, the heights are summed into prefix sums and the
+    last row group fitting on a page is found by bisection. A row group starting a page other than the first repeats
+    its whole row label, so its height as the first on a page is kept too.
+
+    The row groups walked while planning are kept until release() is called, so a column page printed right after it
+    is planned is laid out once. Once released, the row groups of a page are built again from its first row.
+    """
+    def __init__(self, table, pageindex):
+        self.columns = table.columns
+        self.pageindex = pageindex
+        self.double_spaced = table.double_spaced
+        self.fixed_lines = table.get_fixed_lines(pageindex)
+
+        heights, first_heights, rowstarts, rowgroups = [], [], [], []
+        row = 0
+        for rowgroup in self.getrowgroup():
+            rowgroups.append(rowgroup)
+            rows_lines = rowgroup.rows_lines
+            label_lines = rowgroup.rowlabel.max_lines
+            heights.append(rows_lines + label_lines)
+            first_heights.append(rows_lines + (
+                label_lines if rowgroup.rowlabel.print_index == 0 else rowgroup.rowlabel.reprint().max_lines))
+            rowstarts.append(row)
+            row += len(rowgroup.rows)
+
+        self.heights = tuple(heights)
+        self.first_heights = tuple(first_heights)
+        self.rowstarts = tuple(rowstarts)
+        self.rowgroups = rowgroups
+        self.breaks = self._plan(table.page.pagesize - self.fixed_lines)
+
+    def getrowgroup(self, start=0):
+        return self.columns.getrowgroup(*self.columns.pages[self.pageindex], width=self.columns.width[self.pageindex],
+                                        spacing=self.columns.spacing, start=start)
+
+    def _plan(self, body_lines):
+        spacing = 1 if self.double_spaced else 0
+        # used[k] is the lines taken by the first k row groups when printed one after another
+        used = list(accumulate((height + spacing for height in self.heights), initial=0))
+        nrowgroups = len(self.heights)
+
+        breaks = []
+        start, stop = 0, max(bisect_right(used, body_lines) - 1, 0)
+        while True:
+            lines = used[stop] - used[start]
+            if stop > start:
+                lines += self.first_heights[start] - self.heights[start]
+            breaks.append(PageBreak(self.pageindex, len(breaks), start, stop, self.fixed_lines + lines))
+
+            if stop >= nrowgroups:
+                return breaks
+
+            start = stop
+            first_lines = self.first_heights[start] + spacing
+            stop = max(bisect_right(used, body_lines - first_lines + used[start + 1], lo=start + 1) - 1, start + 1)
+
+    def __len__(self):
+        return len(self.breaks)
+
+    def release(self):
+        self.rowgroups = None
+
+    def getrowgroups(self, page):
+        """Row groups of a page, the first one with its whole row label
+        """
+        pagebreak = self.breaks[page]
+        if pagebreak.stop == pagebreak.start:
+            return []
+
+        if self.rowgroups is not None:
+            first = self.rowgroups[pagebreak.start]
+            return [RowGroup(*first.rows, rowlabel=first.rowlabel.reprint()),
+                    *self.rowgroups[pagebreak.start + 1:pagebreak.stop]]
+
+        return list(islice(self.getrowgroup(start=self.rowstarts[pagebreak.start]), pagebreak.stop - pagebreak.start))
+
+
 class Table:
+    # Characters of page bodies a numbered table keeps in memory before spooling them to a temporary file
+    spool_size = 1 << 20
+
     def __init__(self, columns, page, title=None, footnotes=None, before_header_line=True,
-                 after_header_line=True, display_header=True, linechar='\u2014', double_spaced=False):
+                 after_header_line=True, display_header=True, linechar='\u2014', double_spaced=False,
+                 allocator='recurse'):
         self.columns = columns
         self.page = page
+        self.allocator = allocator
         self.display_header = display_header
         self.double_spaced = double_spaced
         self.linechar = linechar
@@ -71,15 +246,67 @@ class Table:
         self.after_header_line = after_header_line
 
         self.line = self.linechar * self.page.linesize
+        self.width_calculated = False
+        self._plans = {}
+        self._planned = None
+        self._page_index = None
+        self._blocks = {}
+        self.generation = self.columns.generation
+
+        self.numbered = _has_page_numbers(title) or self.footnotes.has_page_numbers
+        if self.numbered:
+            self.number_pages(1)
+
+    def number_pages(self, digits):
+        """Lays the page number tokens of the title and footnotes out digits wide
+        """
+        self.page_digits = digits
+        self.title.number_pages(digits)
+        self.footnotes.number_pages(digits)
+        self._blocks = {}
+
+    def get_title_block(self):
+        block = self._blocks.get('title')
+        if block is None:
+            if self.title.content_width > 0:
+                block = Block.of(self.title)
+                block.lines.append('\n')
+            else:
+                block = Block()
+            block = self._blocks['title'] = block
+
+        return block
+
+    def get_footnote_block(self):
+        block = self._blocks.get('footnotes')
+        if block is None:
+            block = self._blocks['footnotes'] = Block.of(*self.footnotes.footnotes)
+
+        return block
+
+    def get_header_block(self, pageindex):
+        """Header of a column page with the lines around it, max_lines counts the header rows only
+        """
+        block = self._blocks.get(pageindex)
+        if block is None:
+            header = self.columns.get_header_row(pageindex)
+            file = StringIO()
+            if self.display_header:
+                self.print_header(header, file)
+            else:
+                file.write(self.line + '\n')
+            block = self._blocks[pageindex] = Block([file.getvalue()], max_lines=header.max_lines)
+
+        return block
 
     def get_fixed_lines(self, pageindex):
         # A line before table start, a line before footnote is always printed, so the
         # constant 2 is added
         fixed_lines = self.title.max_lines + (
-                self.title.max_lines > 0) * 1 + self.footnotes.max_lines + 2
+                self.title.max_lines > 0) * 1 + self.get_footnote_block().max_lines + 2
 
         if self.display_header:
-            fixed_lines = fixed_lines + self.columns.get_header_row(pageindex).max_lines
+            fixed_lines = fixed_lines + self.get_header_block(pageindex).max_lines
 
             if self.after_header_line:
                 fixed_lines += 1
@@ -97,13 +324,16 @@ class Table:
             file.write(self.line)
             file.write('\n')
 
-    def print_page(self, header, rowgroups, file):
-        self.title.write(file)
+    def print_page(self, pageindex, rowgroups, file, numbers=None):
+        # Title, header and footnotes are rendered once per column page and copied onto each page
+        self.get_title_block().write(file, numbers)
+        self.print_body(pageindex, rowgroups, file)
+        self.get_footnote_block().write(file, numbers)
 
-        if self.display_header:
-            self.print_header(header, file)
-        else:
-            file.write(self.line + '\n')
+    def print_body(self, pageindex, rowgroups, file):
+        """A page without its title and footnotes, the only part that doesn't depend on the page numbers
+        """
+        self.get_header_block(pageindex).write(file)
 
         for rowgroup in rowgroups:
             rowgroup.rowlabel.write(file)
@@ -116,32 +346,211 @@ class Table:
                     file.write('\n')
 
         file.write(self.line + '\n')
-        self.footnotes.write(file)
 
-    def print_table(self, file):
-        self.columns.calculate_width(self.page.linesize)
+    def render_bodies(self, pageindex):
+        """print_body of each page of a column page
+        """
+        bodies = []
+        for rowgroups in self.paginate(pageindex):
+            file = StringIO()
+            self.print_body(pageindex, rowgroups, file)
+            bodies.append(file.getvalue())
+
+        return bodies
+
+    def plan(self, pageindex):
+        """PagePlan of a column page, only the plan built last keeps its row groups
+        """
+        plan = self._plans.get(pageindex)
+        if plan is None:
+            if self._planned is not None:
+                self._planned.release()
+            plan = self._plans[pageindex] = self._planned = PagePlan(self, pageindex)
+
+        return plan
+
+    def paginate(self, pageindex):
+        """Yields the row groups of each page of a column page as soon as its line budget is filled
+
+        One pass over the row groups, breaking pages where PagePlan does. A row group starting a page other than the
+        first repeats its whole row label.
+        """
+        spacing = 1 if self.double_spaced else 0
+        body_lines = self.page.pagesize - self.get_fixed_lines(pageindex)
+        remaining_lines = body_lines
+        rowgroups_to_print = []
+
+        for rowgroup in self.columns.getrowgroup(*self.columns.pages[pageindex], width=self.columns.width[pageindex],
+                                                 spacing=self.columns.spacing):
+            if remaining_lines >= rowgroup.max_lines + spacing:
+                rowgroups_to_print.append(rowgroup)
+                remaining_lines = remaining_lines - rowgroup.max_lines - spacing
+            else:
+                yield rowgroups_to_print
+                # Row labels are shared between row groups, the label is reprinted from a copy
+                rowgroup = RowGroup(*rowgroup.rows, rowlabel=rowgroup.rowlabel.reprint())
+                rowgroups_to_print = [rowgroup]
+                remaining_lines = body_lines - rowgroup.max_lines - spacing
+
+        yield rowgroups_to_print
+
+    def calculate_width(self):
+        self.columns.calculate_width(self.page.linesize, allocator=self.allocator)
+        self._reset_layout()
+        self.width_calculated = True
+        return self
+
+    def _reset_layout(self):
+        self.width_calculated = False
+        self._plans = {}
+        self._planned = None
+        self._page_index = None
+        self._blocks = {}
+        self.generation = self.columns.generation
+
+    def _check_layout(self):
+        # Columns laid out again since, by add_cells or calculate_width on the Columns, widths, plans and blocks are
+        # stale
+        if self.generation != self.columns.generation:
+            self._reset_layout()
+
+    def page_index(self):
+        """PageBreaks of all pages in print order, column page by column page
+
+        Widths are calculated on first use, later calls reuse them along with the page plans until calculate_width()
+        is called again, or the Columns are changed.
+        """
+        self._check_layout()
+        if self._page_index is None:
+            if not self.width_calculated:
+                self.calculate_width()
+
+            while True:
+                # Planned last to first, so the row groups of the first column page are still there to print it
+                for i in reversed(tuple(self.columns.pages)):
+                    self.plan(i)
+                index = [pagebreak for i in self.columns.pages for pagebreak in self.plan(i).breaks]
+                digits = len(str(len(index)))
+                if not self.numbered or digits <= self.page_digits:
+                    break
+
+                # Wider page numbers may take more title or footnote lines, then the pages are planned again
+                self.number_pages(digits)
+                if any(self.get_fixed_lines(i) != self.plan(i).fixed_lines for i in self.columns.pages):
+                    self._plans = {}
+                    self._planned = None
+
+            self._page_index = index
+
+        return self._page_index
+
+    def render_pages(self, file, pages=None):
+        """Prints only the given pages, numbered from 0 in print order as in page_index()
+
+        Only the row groups of the requested pages are built, from the cached page plans and column layouts, so
+        after the first call a page is printed without going through the pages before it. All pages print the same
+        as print_table.
+        """
+        index = self.page_index()
+        for n, number in enumerate(range(len(index)) if pages is None else pages):
+            pagebreak = index[number]
+            if n > 0 and pagebreak.page > 0:
+                file.write("\u000C")
+
+            self.print_page(pagebreak.pageindex, self.plan(pagebreak.pageindex).getrowgroups(pagebreak.page), file,
+                            (number + 1, len(index)) if self.numbered else None)
+
+        if self._planned is not None:
+            self._planned.release()
+
+    def print_column_page(self, pageindex, file, numbers=None):
+        """numbers, (first page number, page count), numbers the pages of a table with page number tokens
+        """
+        # Rows are laid out at this column page's widths without touching the cells, so column pages don't depend on
+        # each other. Pages are broken while printing, each row is laid out once
+        for j, rowgroups in enumerate(self.paginate(pageindex)):
+            if j > 0:
+                file.write("\u000C")
+            self.print_page(pageindex, rowgroups, file, (numbers[0] + j, numbers[1]) if numbers is not None else None)
+
+    def render_column_page(self, pageindex, numbers=None):
+        file = StringIO()
+        self.print_column_page(pageindex, file, numbers)
+        return file.getvalue()
+
+    def print_table(self, file, executor=None):
+        """Column pages are printed in order. With a concurrent.futures executor they are rendered by its workers and
+        written as they complete in order. Widths already calculated are reused
+        """
+        self._check_layout()
+        if not self.width_calculated:
+            self.calculate_width()
         print(self.columns.pages)
-        for i in self.columns.pages:
-            self.columns.set_cell_width(self.columns.width[i])
-            remaining_lines = self.page.pagesize - self.get_fixed_lines(i)
-            rowgroups_to_print = tuple()
-
-            for rowgroup in self.columns.getrowgroup(*self.columns.pages[i], width=self.columns.width[i], spacing=self.columns.spacing):
-                if remaining_lines >= rowgroup.max_lines + (1 if self.double_spaced else 0):
-                    rowgroups_to_print = rowgroups_to_print + (rowgroup,)
-                    remaining_lines = remaining_lines - rowgroup.max_lines
-                else:
-                    self.print_page(self.columns.get_header_row(i), rowgroups_to_print, file)
+
+        pages = tuple(self.columns.pages)
+        if self.numbered:
+            self.print_numbered(pages, file, executor)
+        elif executor is None:
+            for i in pages:
+                self.print_column_page(i, file)
+        else:
+            for text in executor.map(_render_column_page, (self.column_page(i) for i in pages), pages):
+                file.write(text)
+
+    def print_numbered(self, pages, file, executor=None):
+        """Prints a table with page number tokens in one pass over its rows
+
+        The pages are written to a spool without their titles and footnotes, which are written in once the page count
+        is known. Only when the count takes more digits than the tokens were laid out for, and the wider numbers
+        change the lines the title or footnotes take, are the pages rendered again.
+        """
+        while True:
+            fixed_lines = {i: self.get_fixed_lines(i) for i in pages}
+            spool = SpooledTemporaryFile(self.spool_size, mode='w+', encoding='utf-8', newline='')
+            if executor is None:
+                bodies = (self.render_bodies(i) for i in pages)
+            else:
+                bodies = executor.map(_render_bodies, (self.column_page(i) for i in pages), pages)
+
+            lengths = []
+            for i, column_page_bodies in zip(pages, bodies):
+                for j, body in enumerate(column_page_bodies):
+                    spool.write(body)
+                    lengths.append((j, len(body)))
+
+            digits = len(str(len(lengths)))
+            if digits <= self.page_digits:
+                break
+
+            self.number_pages(digits)
+            if all(self.get_fixed_lines(i) == fixed_lines[i] for i in pages):
+                break
+            spool.close()
+
+        with spool:
+            spool.seek(0)
+            for number, (j, length) in enumerate(lengths, 1):
+                if j > 0:
                     file.write("\u000C")
-                    rowgroup.rowlabel.print_index = 0
-                    rowgroups_to_print = (rowgroup,)
-                    remaining_lines = self.page.pagesize - self.get_fixed_lines(i) - rowgroup.max_lines
+                self.get_title_block().write(file, (number, len(lengths)))
+                file.write(spool.read(length))
+                self.get_footnote_block().write(file, (number, len(lengths)))
 
-                if self.double_spaced:
-                    remaining_lines = remaining_lines - 1
+    def column_page(self, pageindex):
+        table = copy.copy(self)
+        table.columns = self.columns.column_page(pageindex)
+        table._plans = {}
+        table._planned = None
+        table._page_index = None
+        return table
+
+
+def _render_column_page(table, pageindex, numbers=None):
+    return table.render_column_page(pageindex, numbers)
 
-            self.print_page(self.columns.get_header_row(i), rowgroups_to_print, file)
 
+def _render_bodies(table, pageindex):
+    return table.render_bodies(pageindex)
 
 # import lorem
 # 
@@ -1,12 +1,8 @@
 import pandas as pd
 import numpy as np
-import simplejson as json
 from statistics import mode
 from decimal import Decimal
 
-# adsldf = pd.read_excel(r"C:\Users\sasg\PycharmProjects\test\src\assets\adsl.xlsx", 'adsl')
-adsldf = pd.read_sas(r"P:\nn7415\nn7415-4255\ctr_20190130_er\stats\data\adam\xprt\adsl.xpt", encoding='UTF-8')
-
 
 class CatgoSummary:
     def __init__(self, df, anavars, byvars, idvars, stats, totalover=None):
@@ -17,6 +13,10 @@ class CatgoSummary:
         self.stats = self._assign_prop(stats)
         self.totalover = self._assign_prop(totalover)
 
+        for totvar in self.totalover:
+            if totvar not in self.byvars and totvar not in self.anavars:
+                raise ValueError(f"totalover variable '{totvar}' is neither a by variable nor an anavar")
+
     def _assign_prop(self, prop):
         if isinstance(prop, (list, tuple)):
             return prop
@@ -28,120 +28,159 @@ class CatgoSummary:
     def _dedup(self, df, *vars):
         return df.drop_duplicates(subset=vars)
 
-    def _count(self, df, anavar, byvars, rename, compute_nonmiss, totalover):
+    def _total(self, counts, totvar):
+        levels = [name for name in counts.index.names if name != totvar]
+        total = pd.concat({'TOTAL': counts.groupby(level=levels, sort=False, dropna=False).sum()}, names=[totvar])
+
+        return total.reorder_levels(counts.index.names)
 
+    def _value_counts(self, df, anavar, byvars, totalover):
         if len(byvars):
-            if len(totalover):
-                for totvar in totalover:
-                    totaldf = df.copy()
-                    totaldf[totvar] = 'TOTAL'
-                    df = pd.concat([df, totaldf])
-
-                summdf = df.groupby([*byvars])[anavar].value_counts(dropna=True).unstack(
-                    level=-1).replace(np.nan, 0)
-            else:
-                summdf = df.groupby([*byvars])[anavar].value_counts(dropna=True).unstack(
-                    level=-1).replace(np.nan, 0)
+            # Missing by and anavar values are kept until the totals are added, a record with a missing totalover
+            # value still counts towards its TOTAL
+            counts = df.groupby([*byvars], dropna=False)[anavar].value_counts(dropna=False)
+
+            for totvar in totalover:
+                # A by variable gets a TOTAL group, the anavar a TOTAL category. Another anavar's total is not
+                # part of this anavar's table
+                if totvar in byvars or totvar == anavar:
+                    counts = pd.concat([counts, self._total(counts, totvar)])
+
+            counts = counts[counts.index.to_frame(index=False)[[*byvars, anavar]].notna().all(axis=1).to_numpy()]
+
+            return counts.sort_index().unstack(level=-1).replace(np.nan, 0)
         else:
-            summdf = df.groupby(['__by__' for i in range(len(df))])[anavar].value_counts(dropna=True).unstack(
+            return df.groupby(['__by__' for i in range(len(df))])[anavar].value_counts(dropna=True).unstack(
                 level=-1).replace(np.nan, 0)
 
+    def _count(self, counts, total, rename, compute_nonmiss):
+        summdf = counts.copy()
         summdf.columns = pd.MultiIndex.from_product([summdf.columns, [rename]])
 
         if compute_nonmiss:
-            summdf.loc[:, ('NONMISS', rename)] = summdf.sum(axis=1, numeric_only=True)
+            summdf.loc[:, ('NONMISS', rename)] = total
         return summdf
 
-    def _percent(self, df, anavar, byvars, rename, compute_nonmiss, totalover, denominator=None):
-        if isinstance(denominator, (np.number,)):
-            pass
-        else:
-            if len(byvars):
-                if len(totalover):
-                    for totvar in totalover:
-                        totaldf = df.copy()
-                        totaldf[totvar] = 'TOTAL'
-                        df = pd.concat([df, totaldf])
-
-                    summdf = df.groupby([*byvars])[anavar].value_counts(normalize=True,
-                                                                        dropna=True).multiply(
-                        100).unstack(level=-1).replace(np.nan, 0)
-                else:
-                    summdf = df.groupby([*byvars])[anavar].value_counts(normalize=True, dropna=True).unstack(
-                        level=-1).replace(np.nan,
-                                          0)
-            else:
-                summdf = df.groupby(['__by__' for i in range(len(df))])[anavar].value_counts(normalize=True,
-                                                                                             dropna=True).multiply(
-                    100).unstack(level=-1).replace(np.nan, 0)
-
-            summdf.columns = pd.MultiIndex.from_product([summdf.columns, [rename]])
-
-            if compute_nonmiss:
-                summdf.loc[:, ('NONMISS', rename)] = 100
-
-            return summdf
-
-    def _getstat(self, anavar, compute_nonmiss, totalover, stat):
-        if stat == 'count':
-            return self._count(self._dedup(self.df, anavar, *self.byvars, *self.idvars), anavar, self.byvars, 'count',
-                               compute_nonmiss, totalover)
-        elif stat == 'pct':
-            return self._percent(self._dedup(self.df, anavar, *self.byvars, *self.idvars), anavar, self.byvars, 'pct',
-                                 compute_nonmiss, totalover)
-        elif stat == 'evnt':
-            return self._count(self.df, anavar, self.byvars, 'evnt', compute_nonmiss, totalover)
+    def _percent(self, counts, total, rename, compute_nonmiss):
+        summdf = counts.div(total, axis=0).multiply(100)
+        summdf.columns = pd.MultiIndex.from_product([summdf.columns, [rename]])
 
-    def _getstats(self, anavar, compute_nonmiss, totalover, *stats):
-        return pd.concat((self._getstat(anavar, compute_nonmiss, totalover, stat) for stat in stats), axis=1,
-                         join='outer')
+        if compute_nonmiss:
+            summdf.loc[:, ('NONMISS', rename)] = 100
 
-    def _convert_to_dict(self, df, anavar):
-        result = []
-        for multindx in df.index:
+        return summdf
 
-            vardict = {'type': 'categorical', 'anavar': anavar, 'indexvar': df.index.names,'index': []}
+    def _getstats(self, anavar, compute_nonmiss, totalover, *stats):
+        # count and pct share one dedup and one value_counts per anavar, evnt counts the records as they are
+        tables = {}
+        if 'count' in stats or 'pct' in stats:
+            counts = self._value_counts(self._dedup(self.df, anavar, *self.byvars, *self.idvars), anavar, self.byvars,
+                                        totalover)
+            tables['count'] = tables['pct'] = (counts, counts.sum(axis=1, numeric_only=True))
+        if 'evnt' in stats:
+            counts = self._value_counts(self.df, anavar, self.byvars, totalover)
+            tables['evnt'] = (counts, counts.sum(axis=1, numeric_only=True))
+
+        summdfs = []
+        for stat in stats:
+            if stat in ('count', 'evnt'):
+                summdfs.append(self._count(*tables[stat], stat, compute_nonmiss))
+            elif stat == 'pct':
+                summdfs.append(self._percent(*tables[stat], stat, compute_nonmiss))
+
+        return pd.concat(summdfs, axis=1, join='outer')
+
+    def _convert_values(self, values, number='decimal', decimals=None):
+        missing = np.isnan(values) if values.dtype.kind in 'fc' else pd.isna(values)
+        present = values[~missing]
+
+        # Counts and percents repeat a lot, so each distinct value is converted once
+        if values.dtype.kind in 'iufb':
+            uniques, inverse = np.unique(present, return_inverse=True)
+            uniques = uniques.tolist()
+        else:
+            uniques, inverse = present.tolist(), np.arange(len(present))
+
+        if number == 'decimal':
+            converted = [Decimal(str(value)) for value in uniques]
+        elif number == 'float':
+            converted = [float(value) for value in uniques]
+        elif number == 'string':
+            converted = [f'{value:.{decimals}f}' for value in uniques]
+        else:
+            raise ValueError(f"unknown number type '{number}'")
 
-            if isinstance(multindx, str):
-                vardict['index'] = [*vardict['index'], multindx]
-            else:
-                vardict['index'] = [*vardict['index'], *multindx]
+        lookup = np.empty(len(converted), dtype=object)
+        lookup[:] = converted
 
-            for var in df.columns.unique(level=anavar):
-                vardict['rows'] = vardict.get('rows', {})
-                vardict['rows'][var] = df.loc[multindx, var].to_dict()
+        result = np.full(values.shape, None, dtype=object)
+        result[~missing] = lookup[inverse.reshape(-1)]
+        return result
+
+    def _convert_to_dict(self, df, anavar, number='decimal', decimals=None):
+        indices = [[multindx] if isinstance(multindx, str) else [*multindx] for multindx in df.index]
+        rows = [{} for multindx in df.index]
 
-                for key, value in vardict['rows'][var].items():
-                    vardict['rows'][var][key] = Decimal(str(value)) if not np.isnan(value) else None
+        for var in df.columns.unique(level=anavar):
+            vardf = df[var]
+            stats = list(vardf.columns)
+            for row, values in zip(rows, self._convert_values(vardf.to_numpy(), number, decimals).tolist()):
+                row[var] = dict(zip(stats, values))
 
+        result = []
+        for index, row in zip(indices, rows):
+            vardict = {'type': 'categorical', 'anavar': anavar, 'indexvar': df.index.names, 'index': index}
+            if row:
+                vardict['rows'] = row
             result.append(vardict)
 
         return result
 
-    def catgosummary(self, compute_nonmiss=True):
+    def catgosummary(self, compute_nonmiss=True, number='decimal', decimals=None):
+        """number='decimal' gives Decimal values as before, 'float' plain floats and 'string' strings rounded to
+        decimals places, which is then required. LoadSummary writes string values as they are, the stat format specs
+        don't apply to them
+        """
+        if number == 'string' and decimals is None:
+            raise ValueError("number='string' needs decimals")
+
         dict = {'summary': []}
         for anavar in self.anavars:
             dict['summary'] = [*dict['summary'],
                                *self._convert_to_dict(
                                    self._getstats(anavar, compute_nonmiss, self.totalover, *self.stats),
-                                   anavar)]
+                                   anavar, number, decimals)]
         return dict
 
 
-catgo = CatgoSummary(adsldf, ['RACE','ETHNIC'], ['TRTLST','SEX'], 'SUBJID', ['count', 'pct'], ['TRTLST'])
-
-
-class NpEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        else:
-            return super(NpEncoder, self).default(obj)
-
-
-with open(r'./output/json/test.json', 'w') as file:
-    json.dump(catgo.catgosummary(compute_nonmiss=True), file, cls=NpEncoder, use_decimal=True)
+def main(argv=None):
+    import argparse
+    from src.calculate_summary import read_data, write_output
+
+    parser = argparse.ArgumentParser(prog='python -m src.calculate_catgo_summary',
+                                     description='Categorical summary of a dataset written to JSON or .npz')
+    parser.add_argument('data', help='SAS, Excel or CSV dataset')
+    parser.add_argument('--sheet', default='adsl', help='Excel sheet (default: %(default)s)')
+    parser.add_argument('--encoding', default='UTF-8')
+    parser.add_argument('--anavars', nargs='+', default=['RACE', 'ETHNIC'])
+    parser.add_argument('--byvars', nargs='+', default=['TRTLST', 'SEX'])
+    parser.add_argument('--idvars', nargs='+', default=['SUBJID'])
+    parser.add_argument('--stats', nargs='+', default=['count', 'pct'])
+    parser.add_argument('--totalover', nargs='*', default=['TRTLST'])
+    parser.add_argument('--no-nonmiss', dest='compute_nonmiss', action='store_false', help='skip the NONMISS row')
+    parser.add_argument('--number', choices=('decimal', 'float', 'string'), default='decimal')
+    parser.add_argument('--decimals', type=int, default=None, help="decimal places, required with --number string")
+    parser.add_argument('-o', '--output', default=r'./output/json/test.json',
+                        help='.json or .npz file (default: %(default)s)')
+    args = parser.parse_args(argv)
+    if args.number == 'string' and args.decimals is None:
+        parser.error('--number string needs --decimals')
+
+    catgo = CatgoSummary(read_data(args.data, args.sheet, args.encoding), args.anavars, args.byvars, args.idvars,
+                         args.stats, args.totalover)
+    write_output(catgo.catgosummary(compute_nonmiss=args.compute_nonmiss, number=args.number,
+                                    decimals=args.decimals), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,8 @@
 import pandas as pd
 import numpy as np
-import simplejson as json
 from statistics import mode
 from decimal import Decimal
 
-shoesDf = pd.read_excel(r"C:\Users\sasg\PycharmProjects\test\src\assets\adsl.xlsx", 'adsl')
-
 
 def _rename(newname):
     def decorator(f):
@@ -20,9 +17,18 @@ def q_at(y):
     def q(x):
         return x.quantile(y)
 
+    q.quantile = y
     return q
 
 
+# Stats that groupby computes in compiled code, the fast path passes these to a single agg call
+FAST_STATS = ('count', 'mean', 'std', 'var', 'sem', 'min', 'max', 'median', 'sum', 'nunique', 'first', 'last')
+
+
+def _statname(stat):
+    return stat if isinstance(stat, str) else stat.__name__
+
+
 class NestedDict(dict):
     """
     Nested dictionary of arbitrary depth with autovivification.
@@ -87,23 +93,90 @@ class NumericSummary():
         self.anavar = anavar
         self.stats = stats if type(stats) is list else [stats]
         self.byvars = byvars if type(byvars) is list else [byvars]
+        self.totalover = totalover if type(totalover) is list else [totalover] if totalover is not None else []
+
+        for totvar in self.totalover:
+            if totvar not in self.byvars:
+                raise ValueError(f"totalover variable '{totvar}' is not a by variable")
 
-    def _calculate_stats(self, compute_total=False):
+    def _totalframes(self):
+        """The records once per totalover variable, with its values all 'TOTAL'. totalover defaults to the first by
+        variable
+        """
+        df = self.df.loc[:, self.anavar + self.byvars]
+        for totvar in self.totalover or self.byvars[:1]:
+            yield df.assign(**{totvar: 'TOTAL'})
+
+    def _calculate_stats(self, compute_total=False, fast=True):
         # for stat in self.stats:
-        if compute_total:
-            df1 = self.df.loc[:, self.anavar + self.byvars]
-            # df1.insert(0, self.columns[0], ['TOTAL' for i in range(self.df.shape[0])], False)
+        if fast:
+            # The total frames keep the rows of self.df in order, so _mode can read the values from self.df
+            return pd.concat([self._aggregate(df.groupby(self.byvars)) for df in
+                              (self.df.loc[:, self.anavar + self.byvars],
+                               *(self._totalframes() if compute_total else ()))])
 
+        if compute_total:
             return pd.concat([
-                self.df.loc[:, self.anavar + self.byvars].groupby(self.byvars).agg(
-                    self.stats),
-                df1.groupby(self.byvars).agg(
-                    self.stats)])
+                self.df.loc[:, self.anavar + self.byvars].groupby(self.byvars).agg(self.stats),
+                *(df.groupby(self.byvars).agg(self.stats) for df in self._totalframes())])
         else:
             return self.df.loc[:, self.anavar + self.byvars].groupby(self.byvars).agg(
                 self.stats)
         # return self.df.pivot_table(values=self.anavar, index=self.by, aggfunc=self.stats)
 
+    def _mode(self, grouped, var, index):
+        """Most frequent value per group, ties going to the value seen first like statistics.mode. Missing values
+        are not counted.
+        """
+        groupids = grouped.ngroup().to_numpy()
+        values = self.df[var].to_numpy()
+        counted = (groupids >= 0) & pd.notna(values)
+
+        codes, uniques = pd.factorize(values[counted])
+        nvalues = max(len(uniques), 1)
+        keys, first, counts = np.unique(groupids[counted].astype(np.int64) * nvalues + codes, return_index=True,
+                                        return_counts=True)
+
+        # Per group: highest count first, then earliest first occurrence
+        groups = keys // nvalues
+        order = np.lexsort((first, -counts, groups))
+        winners = order[np.r_[True, groups[order][1:] != groups[order][:-1]]] if len(order) else order
+
+        return pd.Series(uniques.take(keys[winners] % nvalues), index=index.take(groups[winners]),
+                         name=var).reindex(index)
+
+    def _aggregate(self, grouped):
+        """All stats for all anavars from one groupby object: the built-in stats in one agg call, every q_at level in
+        one quantile call and mode vectorised. Other callables fall back to agg.
+        """
+        builtin = [stat for stat in self.stats if isinstance(stat, str) and stat in FAST_STATS]
+        quantiles = [stat for stat in self.stats if callable(stat) and hasattr(stat, 'quantile')]
+        modes = [stat for stat in self.stats if stat is mode]
+        other = [stat for stat in self.stats if
+                 not (isinstance(stat, str) and stat in FAST_STATS) and stat not in quantiles and stat not in modes]
+
+        columns = {}
+        for stats in (builtin, other):
+            if stats:
+                aggdf = grouped[self.anavar].agg(stats)
+                for column in aggdf.columns:
+                    columns[column] = aggdf[column]
+
+        if quantiles:
+            levels = sorted(set(stat.quantile for stat in quantiles))
+            quantiledf = grouped[self.anavar].quantile(levels).unstack(level=-1)
+            for var in self.anavar:
+                for stat in quantiles:
+                    columns[(var, stat.__name__)] = quantiledf[(var, stat.quantile)]
+
+        if modes:
+            index = grouped.size().index
+            for var in self.anavar:
+                columns[(var, 'mode')] = self._mode(grouped, var, index)
+
+        return pd.DataFrame({(var, _statname(stat)): columns[(var, _statname(stat))] for var in self.anavar for stat in
+                             self.stats})
+
     def _calculate_catgo_stats(self, compute_total=False):
         return self.df.loc[:, self.anavar + self.byvars + self.columns].groupby(
             self.byvars + self.columns).value_counts()
@@ -111,55 +184,81 @@ class NumericSummary():
 
     def _convert_to_dict(self, summarydf):
         final = {'summary': []}
-        for var in summarydf.columns.unique(level=0):
-            for multindx in summarydf.index:
-                vardict = {'type': 'numeric', 'anavar': var, 'indexvar': summarydf.index.names,'index': []}
-                # cnt = 0
+        indexvar = summarydf.index.names
+        indices = [[multindx] if isinstance(multindx, str) else [*multindx] for multindx in summarydf.index]
 
-                # for i in range(len(self.byvars)):
-                #     vardict['index'].append(multindx[i])
-                #     cnt += 1
-
-                # for i in range(len(multindx)):
-                #     vardict['index'].append(multindx[i])
-
-                if isinstance(multindx, str):
-                    vardict['index'] = [*vardict['index'], multindx]
-                else:
-                    vardict['index'] = [*vardict['index'], *multindx]
-
-                vardict['statistics'] = summarydf.loc[multindx, var].to_dict()
+        for var in summarydf.columns.unique(level=0):
+            vardf = summarydf[var]
+            stats = list(vardf.columns)
 
-                for key, value in vardict['statistics'].items():
-                    vardict['statistics'][key] = value if not np.isnan(value) else None
+            # One array per anavar, in the dtype a row of vardf would have, with NaN replaced by None
+            values = vardf.to_numpy()
+            missing = np.isnan(values) if values.dtype.kind in 'fc' else pd.isna(values)
+            values = values.astype(object)
+            values[missing] = None
 
-                final['summary'].append(vardict)
+            for index, row in zip(indices, values.tolist()):
+                final['summary'].append({'type': 'numeric', 'anavar': var, 'indexvar': indexvar, 'index': index,
+                                         'statistics': dict(zip(stats, row))})
 
         return final
 
+    def numericsummary(self, compute_total=False, fast=True):
+        return self._convert_to_dict(self._calculate_stats(compute_total=compute_total, fast=fast))
+
 
 def _schema(self):
     schema = {'anavar': self.anavar, 'column': self.columns, 'byvar': self.byvars}
     return schema
 
 
-numsum = NumericSummary(shoesDf, ['AGE','WGTBL','HGTBL'], ['TRTLST','RACE'],
-                        ['count', 'mean', 'std', 'median', 'min', 'max', mode, q_at(0.05), q_at(0.95)])
-
-
-class NpEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        else:
-            return super(NpEncoder, self).default(obj)
-
-
-# print(numsum._calculate_catgo_stats(compute_total=False))
-with open(r'./output/json/test.json', 'w') as file:
-    json.dump(numsum._convert_to_dict(numsum._calculate_stats(compute_total=False)), file, cls=NpEncoder,
-              use_decimal=True)
+def read_data(file, sheet=0, encoding=None):
+    """Reads a SAS (.xpt, .sas7bdat), Excel or CSV dataset into a DataFrame
+    """
+    name = str(file).lower()
+    if name.endswith(('.xpt', '.sas7bdat')):
+        return pd.read_sas(file, encoding=encoding)
+    elif name.endswith(('.xlsx', '.xlsm', '.xls')):
+        return pd.read_excel(file, sheet)
+    else:
+        return pd.read_csv(file, encoding=encoding)
+
+
+def write_output(summary, file):
+    # The same writer LoadSummary uses for its side artifact
+    from src.LoadSummary import write_summary
+    write_summary(summary, file)
+
+
+def _parsestat(stat):
+    # 'mode' and quantiles named as q_at names them, e.g. '5%'
+    if stat == 'mode':
+        return mode
+    elif stat.endswith('%'):
+        return q_at(float(stat[:-1]) / 100)
+    return stat
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m src.calculate_summary',
+                                     description='Numeric summary of a dataset written to JSON or .npz')
+    parser.add_argument('data', help='SAS, Excel or CSV dataset')
+    parser.add_argument('--sheet', default='adsl', help='Excel sheet (default: %(default)s)')
+    parser.add_argument('--encoding', default=None)
+    parser.add_argument('--anavar', nargs='+', default=['AGE', 'WGTBL', 'HGTBL'])
+    parser.add_argument('--byvars', nargs='+', default=['TRTLST', 'RACE'])
+    parser.add_argument('--stats', nargs='+',
+                        default=['count', 'mean', 'std', 'median', 'min', 'max', 'mode', '5%', '95%'])
+    parser.add_argument('-o', '--output', default=r'./output/json/test.json',
+                        help='.json or .npz file (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    numsum = NumericSummary(read_data(args.data, args.sheet, args.encoding), args.anavar, args.byvars,
+                            [_parsestat(stat) for stat in args.stats])
+    write_output(numsum.numericsummary(), args.output)
+
+
+if __name__ == '__main__':
+    main()
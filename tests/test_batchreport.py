@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import stat
+import tempfile
+import unittest
+
+import simplejson as json
+
+from src.BatchReport import main, read_manifest, render_table, run_batch, write_atomic
+
+CONFIGS = {'stat-label-config.txt': '[DEFAULT]\ncount = n\nmean = Mean\n',
+           'stat-format-config.txt': '[DEFAULT]\ncount = {:.0f}\nmean = {:.1f}\n',
+           'stat-template-config.txt': '[DEFAULT]\ncount = {}\nmean = {}\n',
+           'label-config.txt': '[DEFAULT]\nTRTLST~Treatment\nGROUP~Group\n',
+           'bad-label-config.txt': 'TRTLST~Treatment without a section\n'}
+
+# Groups in neither alphabetical nor label config order
+GROUPS = ('G2', 'G0', 'G1')
+
+
+def make_summary():
+    return {'summary': [{'type': 'numeric', 'anavar': 'AGE', 'indexvar': ['TRTLST', 'GROUP'], 'index': [trt, group],
+                         'statistics': {'count': 3, 'mean': 41.5}} for group in GROUPS for trt in ('A', 'B')]}
+
+
+class TestBatchReport(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        for name, content in {**CONFIGS, 'summary.json': json.dumps(make_summary())}.items():
+            with open(os.path.join(self.directory, name), 'w') as fl:
+                fl.write(content)
+
+    def manifest(self, *tables):
+        manifest = os.path.join(self.directory, 'manifest.json')
+        with open(manifest, 'w') as fl:
+            json.dump({'defaults': {'statlabelconfig': 'stat-label-config.txt',
+                                    'statformatconfig': 'stat-format-config.txt',
+                                    'stattemplateconfig': 'stat-template-config.txt',
+                                    'labelconfig': 'label-config.txt', 'summary': 'summary.json',
+                                    'colorder': ['stats', 'A', 'B'], 'title': 'Table'},
+                       'tables': list(tables)}, fl)
+        return manifest
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name), 'r') as fl:
+            return fl.read()
+
+    def test_failing_spec_does_not_stop_the_others(self):
+        specs = read_manifest(self.manifest({'output': 't1.txt'}, {'output': 't2.txt', 'statformatconfig': None},
+                                            {'output': 't3.txt', 'labelconfig': 'bad-label-config.txt'},
+                                            {'output': 't4.txt'}))
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = {name: seconds for name, output, seconds in run_batch(specs, workers=workers)}
+
+                self.assertEqual(set(results), {'t1.txt', 't2.txt', 't3.txt', 't4.txt'})
+                self.assertIsInstance(results['t2.txt'], Exception)
+                self.assertIsInstance(results['t3.txt'], Exception)
+                self.assertNotIsInstance(results['t1.txt'], Exception)
+                self.assertNotIsInstance(results['t4.txt'], Exception)
+                self.assertEqual(self.read('t1.txt'), self.read('t4.txt'))
+
+    def test_write_atomic(self):
+        output = os.path.join(self.directory, 'out', 'table.txt')
+        umask = os.umask(0o027)
+        try:
+            write_atomic(output, lambda fl: fl.write('table\n'))
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(os.listdir(os.path.dirname(output)), ['table.txt'])
+        self.assertEqual(stat.S_IMODE(os.stat(output).st_mode), 0o640)
+        self.assertEqual(self.read(output), 'table\n')
+
+    def test_write_atomic_failure_keeps_old_output(self):
+        output = os.path.join(self.directory, 'table.txt')
+        write_atomic(output, lambda fl: fl.write('old\n'))
+
+        def fail(fl):
+            fl.write('partial')
+            raise RuntimeError('write failed')
+
+        self.assertRaises(RuntimeError, write_atomic, output, fail)
+        self.assertEqual(self.read(output), 'old\n')
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith('.tmp')])
+
+    def test_rows_in_first_appearance_order(self):
+        spec, = read_manifest(self.manifest({'output': 't1.txt'}))
+        self.assertIsNone(spec['labelorderconfig'])
+        render_table(spec)
+
+        text = self.read('t1.txt')
+        self.assertEqual(sorted(GROUPS, key=text.index), list(GROUPS))
+
+    def test_print_table_output_stays_out_of_the_report(self):
+        manifest = self.manifest({'output': 't1.txt'}, {'output': 't2.txt'})
+        report = io.StringIO()
+        with contextlib.redirect_stdout(report):
+            self.assertEqual(main([manifest, '-j', '1']), 0)
+
+        lines = report.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('t1.txt: ') and lines[1].startswith('t2.txt: '))
+        self.assertTrue(lines[2].startswith('2 of 2 tables'))
+
+
+if __name__ == '__main__':
+    unittest.main()
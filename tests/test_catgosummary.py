@@ -0,0 +1,52 @@
+import unittest
+
+import pandas as pd
+
+from src.calculate_catgo_summary import CatgoSummary
+from src.LoadStats import StatTemplate
+
+
+def counts(summary):
+    return {(record['index'][0], row): float(statdict['count']) for record in summary['summary'] for row, statdict in
+            record['rows'].items()}
+
+
+class TestTotalOver(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'TRT': ['A'] * 97 + ['B'] * 93, 'ETH': ['H'] * 97 + [None] * 3 + ['N'] * 90,
+                                'ID': [str(i) for i in range(190)]})
+
+    def test_anavar_total_category(self):
+        # Records with a missing anavar count towards the TOTAL category, as the old TOTAL copy of the records did
+        summary = CatgoSummary(self.df, ['ETH'], ['TRT'], 'ID', ['count'], ['ETH']).catgosummary(compute_nonmiss=False)
+        self.assertEqual(counts(summary), {('A', 'H'): 97, ('A', 'N'): 0, ('A', 'TOTAL'): 97,
+                                           ('B', 'H'): 0, ('B', 'N'): 90, ('B', 'TOTAL'): 93})
+
+    def test_by_variable_total_group(self):
+        summary = CatgoSummary(self.df, ['ETH'], ['TRT'], 'ID', ['count'], ['TRT']).catgosummary(compute_nonmiss=False)
+        self.assertEqual(counts(summary), {('A', 'H'): 97, ('A', 'N'): 0, ('B', 'H'): 0, ('B', 'N'): 90,
+                                           ('TOTAL', 'H'): 97, ('TOTAL', 'N'): 90})
+
+    def test_unknown_totalover(self):
+        self.assertRaises(ValueError, CatgoSummary, self.df, ['ETH'], ['TRT'], 'ID', ['count'], ['SEX'])
+
+
+class TestStringNumbers(unittest.TestCase):
+    def setUp(self):
+        self.catgo = CatgoSummary(pd.DataFrame({'TRT': ['A', 'A', 'A'], 'ETH': ['H', 'N', 'N'], 'ID': ['1', '2', '3']}),
+                                  ['ETH'], ['TRT'], 'ID', ['count', 'pct'])
+
+    def test_decimals_required(self):
+        self.assertRaises(ValueError, self.catgo.catgosummary, number='string')
+
+    def test_strings_rounded_and_not_reformatted(self):
+        record = self.catgo.catgosummary(compute_nonmiss=False, number='string', decimals=1)['summary'][0]
+        self.assertEqual(record['rows']['H'], {'count': '1.0', 'pct': '33.3'})
+
+        template = StatTemplate('count, pct', '{} ({})', {}, {'count': '{:.0f}', 'pct': '{:.0f}%'})
+        self.assertEqual(template.format(record['rows']['N']), '2.0 (66.7)')
+        self.assertEqual(template.format({'count': 2, 'pct': 66.67}), '2 (67%)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import io
+import math
+import random
+import unittest
+
+from src.Column import *
+
+WORDS = 'a bb ccc dddd eeeee ffffff ggggggg hhhhhhhhh'.split()
+
+
+def make_columns(seed):
+    # A random layout and a linesize wide enough for the idcols and any one other column
+    r = random.Random(seed)
+    cols = [f'c{i}' for i in range(r.randint(1, 12))]
+    cells = [Cell(' '.join(r.choice(WORDS) for _ in range(r.randint(1, 10))), colindex=column, rowindex=row)
+             for row in range(r.randint(1, 15)) for column in cols]
+    idcols = tuple(cols[:r.randint(0, min(2, len(cols) - 1))])
+    columns = Columns(*cells, colorder=tuple(cols), idcols=idcols,
+                      wrap=r.choice([True, False, [r.random() < .5 for _ in cols]]),
+                      wrap_header=r.choice([True, False]),
+                      label=[' '.join(r.choice(WORDS) for _ in range(r.randint(0, 4))) for _ in cols],
+                      minwidth=r.choice([1, 5, 10, [r.randint(1, 20) for _ in cols]]),
+                      maxwidth=r.choice([math.inf, 30, [r.choice([math.inf, r.randint(5, 60)]) for _ in cols]]),
+                      spacing=r.choice([0, 1, 2]))
+
+    pref_min = {column: min(columns.get_pref_min_width(column), columns.maxwidth[column]) + columns.spacing[column]
+                for column in cols}
+    linesize = max(r.randint(40, 160), sum(pref_min[column] for column in idcols) + max(pref_min.values()) + 1)
+    return columns, linesize
+
+
+def layout(seed, allocator):
+    columns, linesize = make_columns(seed)
+    columns.calculate_width(linesize, allocator=allocator)
+    return columns, linesize
+
+
+class TestWaterfill(unittest.TestCase):
+    """'waterfill' against 'recurse' on random layouts, the differences are those documented in
+    Columns.calculate_width
+    """
+    seeds = range(500)
+
+    def test_same_pages(self):
+        for seed in self.seeds:
+            with self.subTest(seed=seed):
+                self.assertEqual(layout(seed, 'waterfill')[0].pages, layout(seed, 'recurse')[0].pages)
+
+    def test_pages_fit(self):
+        for seed in self.seeds:
+            columns, linesize = layout(seed, 'waterfill')
+            for pageindex, page in columns.pages.items():
+                with self.subTest(seed=seed, pageindex=pageindex):
+                    self.assertLessEqual(sum(columns.width[pageindex][column] + columns.spacing[column]
+                                             for column in page), linesize)
+                    for column in page:
+                        self.assertGreaterEqual(columns.width[pageindex][column],
+                                                min(columns.get_pref_min_width(column), columns.maxwidth[column]))
+                        self.assertLessEqual(columns.width[pageindex][column], columns.maxwidth[column])
+
+    def test_same_widths_up_to_rounding(self):
+        # On one page the widths only differ where the ceil rounding of 'recurse' overshoots
+        identical = 0
+        for seed in self.seeds:
+            waterfill, recurse = layout(seed, 'waterfill')[0], layout(seed, 'recurse')[0]
+            if len(recurse.pages) == 1:
+                with self.subTest(seed=seed):
+                    diff = max(abs(waterfill.width[0][column] - recurse.width[0][column]) for column in
+                               recurse.pages[0])
+                    self.assertLessEqual(diff, 6)
+                    identical += diff == 0
+
+        self.assertGreater(identical, 0)
+
+    def test_calculate_width_again(self):
+        for allocator in ('recurse', 'waterfill'):
+            for seed in self.seeds[:100]:
+                with self.subTest(allocator=allocator, seed=seed):
+                    columns, linesize = layout(seed, allocator)
+                    pages, width = dict(columns.pages), {i: dict(page) for i, page in columns.width.items()}
+                    columns.calculate_width(linesize, allocator=allocator)
+                    self.assertEqual((columns.pages, columns.width), (pages, width))
+
+    def test_unknown_allocator(self):
+        columns, linesize = make_columns(0)
+        self.assertRaises(ValueError, columns.calculate_width, linesize, allocator='greedy')
+
+
+def cell_specs(seed):
+    # Cells of a random table with row labels, as (value, colindex, rowindex, label)
+    r = random.Random(seed)
+    cols = [f'c{i}' for i in range(r.randint(1, 6))]
+    return cols, [(' '.join(r.choice(WORDS) for _ in range(r.randint(1, 6))), column, (row // 4, row),
+                   (f'G{row // 4}', f'H{row // 2}')) for row in range(r.randint(1, 30)) for column in cols]
+
+
+def make_cells(specs):
+    return [Cell(value, colindex=column, rowindex=rowindex, label=label) for value, column, rowindex, label in specs]
+
+
+def build(cols, specs, added=()):
+    columns = Columns(*make_cells(specs), colorder=tuple(cols), spacing=1, wrap=False, label=cols)
+    return columns.add_cells(*make_cells(added)) if added else columns
+
+
+def rowgroups(columns):
+    file = io.StringIO()
+    for rowgroup in columns.getrowgroup(*columns.colorder, width=columns.width[0], spacing=columns.spacing):
+        rowgroup.rowlabel.write(file)
+        for row in rowgroup.rows:
+            row.write(file)
+    return file.getvalue()
+
+
+class TestAddCells(unittest.TestCase):
+    """Columns built from some cells and added the rest against Columns built from all of them
+    """
+    def test_same_as_built_at_once(self):
+        for seed in range(200):
+            cols, specs = cell_specs(seed)
+            r = random.Random(seed)
+            # Every column keeps a cell, the added cells fall before, between and after the rows already there
+            first = {column: i for i, (value, column, rowindex, label) in reversed(list(enumerate(specs)))}
+            keep = [spec for i, spec in enumerate(specs) if i in first.values() or r.random() < .5]
+            added = [spec for spec in specs if spec not in keep]
+            r.shuffle(added)
+
+            with self.subTest(seed=seed):
+                columns, expected = build(cols, keep, added), build(cols, specs)
+                for column in cols:
+                    self.assertEqual(columns.get_max_content_width(column), expected.get_max_content_width(column))
+                    self.assertEqual(columns.get_avg_content_width(column), expected.get_avg_content_width(column))
+                self.assertEqual((columns.pages, columns.width), (expected.pages, expected.width))
+                self.assertEqual(rowgroups(columns), rowgroups(expected))
+
+    def test_added_after_layout(self):
+        # Laid out and split into column pages, then added to: the layout goes back to one page of preferred widths
+        cols, specs = cell_specs(6)
+        columns = build(cols, specs[:len(cols)])
+        rowgroups(columns)
+        columns.calculate_width(max(width for width in columns.width[0].values()) + 1)
+        self.assertGreater(len(columns.pages), 1)
+        columns.add_cells(*build(cols, specs[len(cols):]).cells)
+        self.assertEqual((columns.pages, columns.width[0]), ({0: tuple(cols)}, build(cols, specs).width[0]))
+        self.assertEqual(rowgroups(columns), rowgroups(build(cols, specs)))
+
+
+class TestRowLabels(unittest.TestCase):
+    def test_list_labels(self):
+        for seed in range(20):
+            cols, specs = cell_specs(seed)
+            with self.subTest(seed=seed):
+                self.assertEqual(rowgroups(build(cols, [(*spec[:3], list(spec[3])) for spec in specs])),
+                                 rowgroups(build(cols, specs)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+import unittest
+
+RENDER_MODULES = ('src.Column', 'src.Table', 'src.LoadStats', 'src.LoadLabels', 'src.LoadSummary')
+HEAVY_MODULES = ('pandas', 'numpy', 'simplejson')
+
+
+class TestRenderImports(unittest.TestCase):
+    def test_render_modules_import_without_heavy_modules(self):
+        # A fresh interpreter, so modules imported by other tests don't count
+        script = '\n'.join([*(f'import {module}' for module in RENDER_MODULES), 'import sys',
+                            f'print(*(module for module in {HEAVY_MODULES!r} if module in sys.modules))'])
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
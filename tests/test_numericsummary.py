@@ -0,0 +1,40 @@
+import unittest
+from statistics import mode
+
+import pandas as pd
+
+from src.calculate_summary import NumericSummary, q_at
+
+
+class TestTotal(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'TRT': ['A', 'A', 'B', 'B', 'B', 'A'], 'SEX': ['F', 'M', 'F', 'F', 'M', 'F'],
+                                'AGE': [30.0, 40.0, 50.0, 50.0, 70.0, 20.0]})
+
+    def summary(self, fast, **kwargs):
+        return NumericSummary(self.df, ['AGE'], ['TRT', 'SEX'], ['count', 'mean', mode, q_at(0.5)],
+                              **kwargs)._calculate_stats(compute_total=True, fast=fast)
+
+    def test_total_group(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast):
+                summarydf = self.summary(fast)
+
+                self.assertFalse(summarydf.index.duplicated().any())
+                self.assertEqual(list(summarydf.index), [('A', 'F'), ('A', 'M'), ('B', 'F'), ('B', 'M'),
+                                                         ('TOTAL', 'F'), ('TOTAL', 'M')])
+                self.assertEqual(list(summarydf[('AGE', 'count')]), [2, 1, 2, 1, 4, 2])
+                self.assertEqual(list(summarydf[('AGE', 'mean')]), [25.0, 40.0, 50.0, 70.0, 37.5, 55.0])
+                self.assertEqual(summarydf.loc[('TOTAL', 'F'), ('AGE', 'mode')], 50.0)
+
+    def test_totalover(self):
+        summarydf = self.summary(True, totalover='SEX')
+        self.assertEqual(list(summarydf.index)[-2:], [('A', 'TOTAL'), ('B', 'TOTAL')])
+        self.assertEqual(list(summarydf[('AGE', 'count')])[-2:], [3, 3])
+
+    def test_unknown_totalover(self):
+        self.assertRaises(ValueError, NumericSummary, self.df, ['AGE'], ['TRT'], ['mean'], 'SEX')
+
+
+if __name__ == '__main__':
+    unittest.main()
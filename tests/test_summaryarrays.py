@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import simplejson as json
+from statistics import mode
+
+from src.calculate_catgo_summary import CatgoSummary
+from src.calculate_summary import NumericSummary
+from src.LoadSummary import write_summary
+from src.SummaryArrays import read_summary
+
+SUMMARY = {'summary': [
+    {'type': 'numeric', 'anavar': 'AGE', 'indexvar': ['TRTPN', 'RACE'], 'index': [1, 'WHITE'],
+     'statistics': {'count': 12, 'mean': 41.5, 'std': None}},
+    {'type': 'numeric', 'anavar': 'AGE', 'indexvar': ['TRTPN', 'AVISITN'], 'index': [np.int64(2), 1.5],
+     'statistics': {'count': np.int64(3), 'mean': np.float64(0.1)}},
+    {'type': 'numeric', 'anavar': 'AGE', 'indexvar': ['TRTPN', 'AVISITN'], 'index': [Decimal('3'), Decimal('2.25')],
+     'statistics': {'mean': Decimal('1.10')}},
+    {'type': 'categorical', 'anavar': 'SEX', 'indexvar': ['TRT', 'FLAG', 'MISSING'], 'index': ['A', True, None],
+     'rows': {'F': {'count': 4, 'pct': 40.0}, 'M': {'count': 6, 'pct': 60.0}}},
+    {'type': 'categorical', 'anavar': 'SEX', 'indexvar': [], 'index': []}]}
+
+
+class TestSummaryArrays(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def roundtrip(self, summary):
+        jsonfile = os.path.join(self.directory.name, 'summary.json')
+        npzfile = os.path.join(self.directory.name, 'summary.npz')
+        write_summary(summary, jsonfile)
+        write_summary(summary, npzfile)
+        with open(jsonfile, 'r') as fl:
+            return json.load(fl, use_decimal=True)['summary'], read_summary(npzfile)[:]
+
+    def test_reads_back_as_json(self):
+        expected, records = self.roundtrip(SUMMARY)
+        self.assertEqual(records, expected)
+        for record, json_record in zip(records, expected):
+            self.assertEqual([type(index) for index in record['index']],
+                             [type(index) for index in json_record['index']])
+
+    def test_index_types(self):
+        expected, records = self.roundtrip(SUMMARY)
+        self.assertEqual(records[0]['index'], [1, 'WHITE'])
+        self.assertEqual(records[1]['index'], [2, Decimal('1.5')])
+        self.assertEqual(records[2]['index'], [3, Decimal('2.25')])
+        self.assertEqual(records[3]['index'], ['A', True, None])
+
+    def test_string_values(self):
+        df = pd.DataFrame({'TRT': ['A', 'A', 'B'], 'RACE': ['W', 'W', 'B\u00e9'], 'ID': ['1', '2', '3']})
+        numeric = NumericSummary(df, ['RACE'], ['TRT'], ['count', mode]).numericsummary()
+        catgo = CatgoSummary(df, ['RACE'], ['TRT'], 'ID', ['count', 'pct']).catgosummary(number='string', decimals=1)
+
+        for summary in (numeric, catgo):
+            expected, records = self.roundtrip(summary)
+            self.assertEqual(records, expected)
+
+        _, records = self.roundtrip(numeric)
+        self.assertEqual([record['statistics'] for record in records],
+                         [{'count': 2, 'mode': 'W'}, {'count': 1, 'mode': 'B\u00e9'}])
+        _, records = self.roundtrip(catgo)
+        self.assertEqual(records[0]['rows']['W'], {'count': '2.0', 'pct': '100.0'})
+
+
+if __name__ == '__main__':
+    unittest.main()
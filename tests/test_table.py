@@ -0,0 +1,155 @@
+import contextlib
+import io
+import re
+import unittest
+
+from src.Table import *
+
+WORDS = 'alpha beta gamma delta epsilon zeta eta theta'.split()
+
+
+def make_table(title=None, footnotes=None, ncols=8, nrows=40, allocator='recurse', grouped=False):
+    # Wide enough to split into column pages at linesize 80, long enough for several pages each
+    cols = tuple(f'c{i}' for i in range(ncols))
+    # grouped rows come in row groups of three, which pages can break between
+    cells = [Cell(' '.join(WORDS[(i + j + k) % len(WORDS)] for k in range(6)), colindex=column, rowindex=i,
+                  label=(f'Group {i // 3}',) if grouped else None)
+             for i in range(nrows) for j, column in enumerate(cols)]
+    return Table(Columns(*cells, colorder=cols, idcols=('c0',), spacing=1, minwidth=12, label=cols), page=Page(80, 20),
+                 title=title, footnotes=footnotes, allocator=allocator)
+
+
+def print_table(table):
+    file = io.StringIO()
+    with contextlib.redirect_stdout(io.StringIO()):
+        table.print_table(file)
+    return file.getvalue()
+
+
+class TestNumberedTable(unittest.TestCase):
+    def test_numbered_table_split_into_column_pages(self):
+        table = make_table(title='Page {page} of {pages}')
+        text = print_table(table)
+
+        self.assertGreater(len(table.columns.pages), 1)
+        numbers = re.findall(r'Page (\d+) of (\d+)', text)
+        npages = len(table.page_index())
+        self.assertGreater(npages, len(table.columns.pages))
+        self.assertEqual(numbers, [(str(n), str(npages)) for n in range(1, npages + 1)])
+
+    def test_wider_page_numbers_wrap_the_title(self):
+        # Fits on one line with one digit page numbers, takes two with two digits
+        title = 'x' * 68 + ' Page {page} of {pages}'
+        table = make_table(title=title, nrows=60, grouped=True)
+        text = print_table(table)
+
+        npages = len(table.page_index())
+        self.assertGreaterEqual(npages, 10)
+        self.assertEqual(re.findall(r'Page (\d+) of\s+(\d+)', text),
+                         [(str(n), str(npages)) for n in range(1, npages + 1)])
+        file = io.StringIO()
+        make_table(title=title, nrows=60, grouped=True).render_pages(file)
+        self.assertEqual(text, file.getvalue())
+
+    def test_spooled_to_disk(self):
+        table = make_table(title='Page {page} of {pages}', footnotes=['{page}/{pages}'])
+        table.spool_size = 100
+        self.assertEqual(print_table(table), print_table(make_table(title='Page {page} of {pages}',
+                                                                   footnotes=['{page}/{pages}'])))
+
+    def test_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        table = make_table(title='Page {page} of {pages}')
+        file = io.StringIO()
+        with ThreadPoolExecutor(2) as executor, contextlib.redirect_stdout(io.StringIO()):
+            table.print_table(file, executor)
+        self.assertEqual(file.getvalue(), print_table(make_table(title='Page {page} of {pages}')))
+
+    def test_no_rowgroups_kept(self):
+        table = make_table(title='Page {page} of {pages}')
+        print_table(table)
+        self.assertEqual(table._plans, {})
+
+        table.render_pages(io.StringIO())
+        self.assertTrue(table._plans)
+        self.assertTrue(all(plan.rowgroups is None for plan in table._plans.values()))
+
+    def test_numbered_table_prints_as_unnumbered(self):
+        numbered = print_table(make_table(title='Page {page} of {pages}'))
+        plain = print_table(make_table(title='Page'))
+
+        self.assertEqual(re.sub(r'Page \d+ of \d+', 'Page', numbered).replace(' ', ''), plain.replace(' ', ''))
+
+
+class TestPaginate(unittest.TestCase):
+    def test_plain_table_streams_without_plans(self):
+        table = make_table()
+        text = print_table(table)
+
+        self.assertEqual(table._plans, {})
+        # Form feeds only separate the pages of a column page
+        self.assertEqual(text.count('\f') + len(table.columns.pages), len(table.page_index()))
+
+    def test_same_breaks_as_page_plan(self):
+        for nrows in (1, 7, 40):
+            for double_spaced in (False, True):
+                with self.subTest(nrows=nrows, double_spaced=double_spaced):
+                    table = make_table(nrows=nrows)
+                    table.double_spaced = double_spaced
+                    table.calculate_width()
+                    for pageindex in table.columns.pages:
+                        plan = table.plan(pageindex)
+                        self.assertEqual([[rowgroup.rows for rowgroup in rowgroups]
+                                          for rowgroups in table.paginate(pageindex)],
+                                         [[rowgroup.rows for rowgroup in plan.getrowgroups(page)]
+                                          for page in range(len(plan))])
+
+
+class TestAddCells(unittest.TestCase):
+    def test_print_add_cells_print(self):
+        table = make_table(nrows=10)
+        print_table(table)
+        cells = [Cell(' '.join(WORDS[(i + j) % len(WORDS)] for j in range(10)), colindex=f'c{i % 8}', rowindex=10)
+                 for i in range(8)]
+        table.columns.add_cells(*cells)
+
+        expected = make_table(nrows=10)
+        expected.columns.add_cells(*cells)
+        self.assertEqual(print_table(table), print_table(expected))
+        self.assertLessEqual(max(len(line) for line in print_table(table).splitlines()), table.page.linesize)
+
+
+class TestRenderPages(unittest.TestCase):
+    def render_pages(self, table, pages=None):
+        file = io.StringIO()
+        table.render_pages(file, pages)
+        return file.getvalue()
+
+    def test_render_pages_then_print_table(self):
+        table = make_table(title='Page {page} of {pages}')
+        pages = self.render_pages(table)
+
+        self.assertGreater(len(table.columns.pages), 1)
+        self.assertEqual(print_table(table), pages)
+        self.assertEqual(print_table(make_table(title='Page {page} of {pages}')), pages)
+
+    def test_calculate_width_then_render_pages(self):
+        table = make_table().calculate_width()
+        pages = dict(table.columns.pages)
+        text = self.render_pages(table.calculate_width())
+
+        self.assertGreater(len(pages), 1)
+        self.assertEqual(table.columns.pages, pages)
+        self.assertEqual(text, print_table(make_table()))
+
+    def test_pages_in_any_order(self):
+        table = make_table()
+        numbers = range(len(table.page_index()))
+        pages = {number: self.render_pages(table, [number]) for number in reversed(numbers)}
+
+        self.assertEqual(''.join(pages[number] for number in numbers), print_table(make_table()).replace('\f', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()